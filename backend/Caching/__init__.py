@@ -0,0 +1,4 @@
+"""
+Caching package with small in-process caches shared across the backend.
+This init file must be here for proper imports in other files.
+"""
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class SnapshotCache:
+    """
+    A document cache kept current by Firestore on_snapshot listeners.
+
+    Each watched key holds a live listener on one document. Firestore pushes a new
+    snapshot whenever the document changes (from any process), so cached reads never
+    need a network hop and never go stale for longer than the listener delay.
+
+    At most max_watches documents are watched; the least recently read is
+    unsubscribed when a new one is added, and watches idle for longer than idle_ttl
+    seconds are dropped on the next watch call.
+
+    A local write should call expect_write with the write's update_time, so that a
+    snapshot from before that write (still in flight on the listener) is not
+    served afterwards.
+    """
+
+    def __init__(self, max_watches: int = 256, idle_ttl: float = 1800):
+        self.max_watches = max_watches
+        self.idle_ttl = idle_ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> {'watch', 'snapshot', 'last_read', 'min_update_time'}
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get the latest snapshot for a watched key, or None if none is usable yet."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['last_read'] = time.monotonic()
+                self._entries.move_to_end(key)
+                if entry['snapshot'] is not None:
+                    self.hits += 1
+                    return entry['snapshot']
+            self.misses += 1
+            return None
+
+    def watch(self, key: Hashable, doc_ref) -> None:
+        """Start listening to doc_ref under key, if it is not watched already."""
+        with self._lock:
+            if key in self._entries:
+                return
+            entry = {'watch': None, 'snapshot': None, 'last_read': time.monotonic(), 'min_update_time': None}
+            self._entries[key] = entry
+            expired = self._evict()
+
+        for watch in expired:
+            watch.unsubscribe()
+
+        def on_snapshot(doc_snapshots, changes, read_time):
+            with self._lock:
+                if self._entries.get(key) is not entry:
+                    return
+                for snapshot in doc_snapshots:
+                    floor = entry['min_update_time']
+                    if floor is not None and snapshot.exists and snapshot.update_time < floor:
+                        continue
+                    entry['snapshot'] = snapshot
+                    entry['min_update_time'] = None
+
+        watch = doc_ref.on_snapshot(on_snapshot)
+        with self._lock:
+            if self._entries.get(key) is entry:
+                entry['watch'] = watch
+                return
+        # Evicted while subscribing
+        watch.unsubscribe()
+
+    def expect_write(self, key: Hashable, update_time: Any) -> None:
+        """Stop serving snapshots older than a write that just committed for key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['min_update_time'] = update_time
+            snapshot = entry['snapshot']
+            if snapshot is not None and (not snapshot.exists or snapshot.update_time < update_time):
+                entry['snapshot'] = None
+
+    def unwatch(self, key: Hashable) -> None:
+        """Stop listening to key and drop its snapshot."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None and entry['watch'] is not None:
+            entry['watch'].unsubscribe()
+
+    def close(self) -> None:
+        """Stop every listener."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            if entry['watch'] is not None:
+                entry['watch'].unsubscribe()
+
+    def _evict(self) -> list:
+        """Drop idle and excess entries (caller holds the lock); returns their watches."""
+        now = time.monotonic()
+        dropped = []
+        for key in list(self._entries):
+            if now - self._entries[key]['last_read'] > self.idle_ttl:
+                dropped.append(self._entries.pop(key))
+        while len(self._entries) > self.max_watches:
+            dropped.append(self._entries.popitem(last=False)[1])
+        return [entry['watch'] for entry in dropped if entry['watch'] is not None]
+
+    def stats(self) -> Dict[str, int]:
+        """Get the hit/miss counters and number of watched documents."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'watched': len(self._entries),
+                'max_watches': self.max_watches
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
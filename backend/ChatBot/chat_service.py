@@ -1,5 +1,5 @@
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from tools_list import function_registry 
 
 from EncryptionKeyStorage.API_key_manager import APIKeyManager
@@ -9,6 +9,7 @@ class ChatService:
     def __init__(self):
         self.api_key_manager = APIKeyManager()
         self.client = OpenAI(api_key=self.api_key_manager.get_api_key('openai'))
+        self.async_client = AsyncOpenAI(api_key=self.api_key_manager.get_api_key('openai'))
         self.tools = self._build_tools()
 
     def _build_tools(self):
@@ -37,22 +38,23 @@ class ChatService:
     def get_user_context(self, user_data_collection):
         """Retrieve and format user context messages."""
         messages = []
+        context = user_data_collection.get_gpt_context()
         
-        goals = user_data_collection.get_goals()
+        goals = context.goals
         if goals:
             messages.append({
                 "role": "system",
                 "content": f"The user has provided their financial goals: {goals}. These should be your overarching focuses. The user's goals are your top priority as their financial advisor. If the goals seem outdated or circumstances have changed significantly, you may suggest updating them."
             })
         
-        preferences = user_data_collection.get_preferences()
+        preferences = context.preferences
         if preferences:
             messages.append({
                 "role": "system",
                 "content": f"The user has indicated these preferences about how they should be communicated with: {preferences}. Adapt your responses to match these preferences in terms of detail level, risk tolerance, and communication style."
             })
         
-        memories = user_data_collection.get_memories()
+        memories = context.memories
         if memories:
             memory_list = "\n• " + "\n• ".join(memories)
             messages.append({
@@ -77,7 +79,7 @@ class ChatService:
         })
 
         try:
-            user_data = UserDataCollection(user_id)
+            user_data = UserDataCollection.for_user(user_id)
             context_messages = self.get_user_context(user_data)
             messages.extend(context_messages)
         except Exception as e:
@@ -85,8 +87,19 @@ class ChatService:
         
         return messages
 
+    @staticmethod
+    def _parse_chunk(chunk):
+        """Get (content, finished) from one streamed completion chunk."""
+        if not chunk.choices:
+            return None, False
+        choice = chunk.choices[0]
+        return choice.delta.content, choice.finish_reason == 'stop'
+
     def get_response_stream(self, messages, prompt):
-        """Get a streaming response from GPT with function calling."""
+        """Get a streaming response from GPT with function calling, yielding the reply's text pieces.
+        
+        Callers add any transport framing (the API routes send each piece as an SSE event).
+        """
         messages.append({"role": "user", "content": prompt})
         
         completion = self.client.chat.completions.create(
@@ -96,12 +109,45 @@ class ChatService:
             stream=True,
         )
 
-        for chunk in completion:
-            if 'choices' in chunk and len(chunk['choices']) > 0:
-                choice = chunk['choices'][0]
-                if 'delta' in choice and 'content' in choice['delta']:
-                    content = choice['delta']['content']
-                    if content:
-                        yield f"data: {content}\n\n"
-                elif 'finish_reason' in choice and choice['finish_reason'] == 'stop':
-                    break 
\ No newline at end of file
+        reply = []
+        try:
+            for chunk in completion:
+                content, finished = self._parse_chunk(chunk)
+                if content:
+                    reply.append(content)
+                    yield content
+                if finished:
+                    break
+        finally:
+            completion.close()
+            # Keep the reply (even a partial one, if the client went away) in the history
+            # so the conversation can be saved and continued
+            messages.append({"role": "assistant", "content": "".join(reply)})
+
+    async def get_response_stream_async(self, messages, prompt):
+        """Async version of get_response_stream that yields the reply's text pieces.
+        
+        Waiting on the model doesn't hold a thread, so one event loop can serve
+        many open chat streams.
+        """
+        messages.append({"role": "user", "content": prompt})
+        
+        completion = await self.async_client.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            tools=self.tools,
+            stream=True,
+        )
+
+        reply = []
+        try:
+            async for chunk in completion:
+                content, finished = self._parse_chunk(chunk)
+                if content:
+                    reply.append(content)
+                    yield content
+                if finished:
+                    break
+        finally:
+            await completion.close()
+            messages.append({"role": "assistant", "content": "".join(reply)})
@@ -0,0 +1,208 @@
+"""
+Server-side storage for chat conversations.
+Conversations are append-only: each turn's new messages are written as one
+zlib-compressed JSON chunk, so a turn never rewrites the earlier history. Only the
+conversation ID needs to be kept in the client's session cookie.
+
+Backends (CONVERSATION_STORE environment variable):
+    sqlite      a SQLite file at CONVERSATION_DB_PATH (default ~/.fynnance/conversations.db,
+                outside the source tree), shared by workers on one host (default)
+    memory      in-process, lost on restart and not shared between workers; keeps at
+                most CONVERSATION_MEMORY_MAX conversations, each for CONVERSATION_MEMORY_TTL
+                seconds after its last use
+    firestore   users/{uid}/conversations/{id}/chunks in the configured storage backend
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from Caching.ttl_cache import TTLCache
+from StorageBackend.storage_backend import get_storage_backend
+
+CONVERSATION_STORE = os.getenv('CONVERSATION_STORE', 'sqlite')
+# Conversations include the user's context (goals, memories), so keep the database out of
+# the repository and readable only by the API user
+CONVERSATION_DB_PATH = os.getenv('CONVERSATION_DB_PATH', os.path.join(os.path.expanduser('~'), '.fynnance', 'conversations.db'))
+CONVERSATION_MEMORY_MAX = int(os.getenv('CONVERSATION_MEMORY_MAX', '10000'))
+CONVERSATION_MEMORY_TTL = float(os.getenv('CONVERSATION_MEMORY_TTL', '86400'))
+
+def _compress(messages: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(json.dumps(messages, separators=(',', ':')).encode())
+
+def _decompress(chunk: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(chunk))
+
+class ConversationStore(ABC):
+    """Interface every conversation store implements."""
+
+    def create(self, user_id: str, messages: List[Dict[str, Any]]) -> str:
+        """
+        Start a conversation for a user.
+
+        Args:
+            user_id: The owner's Firebase Auth UID
+            messages: The opening messages (e.g. system prompt and user context)
+
+        Returns:
+            str: The new conversation's ID
+        """
+        conversation_id = uuid.uuid4().hex
+        self._write_chunk(conversation_id, user_id, _compress(messages), new=True)
+        return conversation_id
+
+    def append(self, conversation_id: str, user_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Append messages to a conversation the user owns."""
+        if messages:
+            self._write_chunk(conversation_id, user_id, _compress(messages), new=False)
+
+    def load(self, conversation_id: str, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get a conversation's messages, or None if it doesn't exist or isn't the user's."""
+        chunks = self._read_chunks(conversation_id, user_id)
+        if chunks is None:
+            return None
+        return [message for chunk in chunks for message in _decompress(chunk)]
+
+    @abstractmethod
+    def _write_chunk(self, conversation_id: str, user_id: str, chunk: bytes, new: bool) -> None:
+        """Store a chunk; raise ValueError if an existing conversation isn't the user's."""
+
+    @abstractmethod
+    def _read_chunks(self, conversation_id: str, user_id: str) -> Optional[List[bytes]]:
+        """Get a conversation's chunks in order, or None if it doesn't exist or isn't the user's."""
+
+class MemoryConversationStore(ConversationStore):
+    """
+    Conversations held in process memory. The least recently used conversations are
+    dropped past maxsize, and idle ones after ttl seconds.
+    """
+
+    def __init__(self, maxsize: int = CONVERSATION_MEMORY_MAX, ttl: float = CONVERSATION_MEMORY_TTL):
+        self._conversations = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def _write_chunk(self, conversation_id: str, user_id: str, chunk: bytes, new: bool) -> None:
+        with self._lock:
+            conversation = {'user_id': user_id, 'chunks': []} if new else self._conversations.get(conversation_id)
+            if conversation is None or conversation['user_id'] != user_id:
+                raise ValueError(f"Conversation {conversation_id} not found")
+            conversation['chunks'].append(chunk)
+            # Re-setting renews the conversation's TTL
+            self._conversations.set(conversation_id, conversation)
+
+    def _read_chunks(self, conversation_id: str, user_id: str) -> Optional[List[bytes]]:
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None or conversation['user_id'] != user_id:
+                return None
+            return list(conversation['chunks'])
+
+class SQLiteConversationStore(ConversationStore):
+    """Conversations in a SQLite database file, one row per appended chunk."""
+
+    def __init__(self, path: str = CONVERSATION_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS conversations ('
+                'id TEXT PRIMARY KEY, user_id TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS conversation_chunks ('
+                'seq INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL, data BLOB NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS conversation_chunks_by_conversation '
+                'ON conversation_chunks (conversation_id, seq)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections aren't shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _write_chunk(self, conversation_id: str, user_id: str, chunk: bytes, new: bool) -> None:
+        with self._connect() as conn:
+            if new:
+                conn.execute(
+                    'INSERT INTO conversations (id, user_id, created_at) VALUES (?, ?, ?)',
+                    (conversation_id, user_id, time.time())
+                )
+            elif not self._owns(conn, conversation_id, user_id):
+                raise ValueError(f"Conversation {conversation_id} not found")
+            conn.execute(
+                'INSERT INTO conversation_chunks (conversation_id, data) VALUES (?, ?)',
+                (conversation_id, chunk)
+            )
+
+    def _read_chunks(self, conversation_id: str, user_id: str) -> Optional[List[bytes]]:
+        conn = self._connect()
+        if not self._owns(conn, conversation_id, user_id):
+            return None
+        rows = conn.execute(
+            'SELECT data FROM conversation_chunks WHERE conversation_id = ? ORDER BY seq',
+            (conversation_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _owns(conn: sqlite3.Connection, conversation_id: str, user_id: str) -> bool:
+        row = conn.execute('SELECT user_id FROM conversations WHERE id = ?', (conversation_id,)).fetchone()
+        return row is not None and row[0] == user_id
+
+class FirestoreConversationStore(ConversationStore):
+    """
+    Conversations under users/{uid}/conversations/{id}, one chunks document per
+    append. Chunk document IDs are time-ordered, so chunks stream back in order.
+    """
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_storage_backend().client()
+
+    def _conversation_ref(self, conversation_id: str, user_id: str):
+        return self.db.collection('users').document(user_id).collection('conversations').document(conversation_id)
+
+    def _write_chunk(self, conversation_id: str, user_id: str, chunk: bytes, new: bool) -> None:
+        conversation_ref = self._conversation_ref(conversation_id, user_id)
+        chunk_id = f'{time.time_ns():020d}-{uuid.uuid4().hex[:8]}'
+        batch = self.db.batch()
+        if new:
+            batch.set(conversation_ref, {'created_at': time.time()})
+        batch.set(conversation_ref.collection('chunks').document(chunk_id), {'data': chunk})
+        batch.commit()
+
+    def _read_chunks(self, conversation_id: str, user_id: str) -> Optional[List[bytes]]:
+        chunks = [doc.get('data') for doc in self._conversation_ref(conversation_id, user_id).collection('chunks').stream()]
+        return chunks or None
+
+_store: Optional[ConversationStore] = None
+_store_lock = threading.Lock()
+
+def get_conversation_store() -> ConversationStore:
+    """Get the process-wide conversation store, created from CONVERSATION_STORE on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if CONVERSATION_STORE == 'memory':
+                    _store = MemoryConversationStore()
+                elif CONVERSATION_STORE == 'sqlite':
+                    _store = SQLiteConversationStore(CONVERSATION_DB_PATH)
+                elif CONVERSATION_STORE == 'firestore':
+                    _store = FirestoreConversationStore()
+                else:
+                    raise ValueError(f"Unknown CONVERSATION_STORE '{CONVERSATION_STORE}'. Use 'memory', 'sqlite' or 'firestore'")
+    return _store
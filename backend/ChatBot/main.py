@@ -45,9 +45,11 @@ def get_user_context(user_data_collection):
     the conversation and maintain context across chat sessions.
     """
     messages = []
+    # All gpt_data documents in one batched read
+    context = user_data_collection.get_gpt_context()
     
     # Get goals if they exist
-    goals = user_data_collection.get_goals()
+    goals = context.goals
     if goals:
         messages.append({
             "role": "developer",
@@ -55,7 +57,7 @@ def get_user_context(user_data_collection):
         })
     
     # Get preferences if they exist
-    preferences = user_data_collection.get_preferences()
+    preferences = context.preferences
     if preferences:
         messages.append({
             "role": "developer",
@@ -63,7 +65,7 @@ def get_user_context(user_data_collection):
         })
     
     # Get memories if they exist (for internal context)
-    memories = user_data_collection.get_memories()
+    memories = context.memories
     if memories:
         # Format memories as a bulleted list
         memory_list = "\n• " + "\n• ".join(memories)
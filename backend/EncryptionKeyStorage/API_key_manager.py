@@ -1,11 +1,26 @@
 from google.cloud import secretmanager
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials
 from cryptography.fernet import Fernet
 import os
 from functools import lru_cache
 from typing import Literal
 
+from StorageBackend.storage_backend import get_storage_backend
+
+# Map service names to Firebase field names
+API_KEY_FIELDS = {
+    'alpha_vantage': 'ALPHA_VANTAGE_KEY',
+    'rentcast': 'RENTCAST_KEY',
+    'fred': 'FRED_KEY',
+    'p_clientid': 'PLAID_CLIENT_ID',
+    'p_secret': 'PLAID_SECRET',
+    'openai': 'OPENAI_KEY'
+}
+
+# Stored in local mode for keys missing from the environment, so the API can start;
+# calls to that service will then fail authentication
+LOCAL_PLACEHOLDER_KEY = 'not-configured'
+
 class APIKeyManager:
     _instance = None
     
@@ -19,18 +34,42 @@ class APIKeyManager:
         if self._initialized:
             return
             
-        # Initialize Firebase if not already initialized
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(APIKeyManager.get_firebase_path())
-            firebase_admin.initialize_app(cred)
-        
-        self.db = firestore.client()
-        self.secret_client = secretmanager.SecretManagerServiceClient(
-            credentials=credentials.Certificate(APIKeyManager.get_firebase_path()).get_credential()
-        )
-        self.fernet = self._initialize_encryption()
+        backend = get_storage_backend()
+        self.db = backend.client()
+        if backend.is_local:
+            # Offline backend: no Secret Manager, so encrypt with LOCAL_FERNET_KEY or a
+            # key generated for this process, and take API keys from the environment
+            self.secret_client = None
+            self.fernet = Fernet(os.getenv('LOCAL_FERNET_KEY') or Fernet.generate_key())
+            self._seed_local_keys()
+        else:
+            self.secret_client = secretmanager.SecretManagerServiceClient(
+                credentials=credentials.Certificate(APIKeyManager.get_firebase_path()).get_credential()
+            )
+            self.fernet = self._initialize_encryption()
         self._initialized = True
     
+    def _seed_local_keys(self) -> None:
+        """Store API keys from the environment (e.g. OPENAI_KEY) in the local database.
+        
+        Each key is read from the environment variable named like its Firebase field.
+        Keys the database already holds are kept.
+        """
+        creds_ref = self.db.collection('credentials').document('api_keys')
+        existing = creds_ref.get()
+        stored = existing.to_dict() if existing.exists else {}
+        missing = {}
+        for field in API_KEY_FIELDS.values():
+            if field in stored:
+                continue
+            api_key = os.getenv(field)
+            if not api_key:
+                print(f"{field} not set; using a placeholder key in local mode")
+                api_key = LOCAL_PLACEHOLDER_KEY
+            missing[field] = self.fernet.encrypt(api_key.encode()).decode()
+        if missing:
+            creds_ref.set(missing, merge=True)
+    
     def _get_secret(self, secret_name: str) -> str:
         """Retrieve a secret from Google Cloud Secret Manager."""
         try:
@@ -63,23 +102,13 @@ class APIKeyManager:
             str: The decrypted API key
         """
         try:
-            # Map service names to Firebase field names
-            firebase_field_map = {
-                'alpha_vantage': 'ALPHA_VANTAGE_KEY',
-                'rentcast': 'RENTCAST_KEY',
-                'fred': 'FRED_KEY',
-                'p_clientid': 'PLAID_CLIENT_ID',
-                'p_secret': 'PLAID_SECRET',
-                'openai': 'OPENAI_KEY'
-            }
-            
             # Get encrypted credentials from Firebase
             creds_doc = self.db.collection('credentials').document('api_keys').get()
             if not creds_doc.exists:
                 raise ValueError("API credentials not found in Firebase")
             
             creds_data = creds_doc.to_dict()
-            firebase_field = firebase_field_map.get(service)
+            firebase_field = API_KEY_FIELDS.get(service)
             
             if not firebase_field:
                 raise ValueError(f"Invalid service: {service}")
@@ -110,17 +139,7 @@ class APIKeyManager:
             None
         """
         try:
-            # Map service names to Firebase field names
-            firebase_field_map = {
-                'alpha_vantage': 'ALPHA_VANTAGE_KEY',
-                'rentcast': 'RENTCAST_KEY',
-                'fred': 'FRED_KEY',
-                'p_clientid': 'PLAID_CLIENT_ID',
-                'p_secret': 'PLAID_SECRET',
-                'openai': 'OPENAI_KEY'
-            }
-            
-            firebase_field = firebase_field_map.get(service)
+            firebase_field = API_KEY_FIELDS.get(service)
             if not firebase_field:
                 raise ValueError(f"Invalid service: {service}")
             
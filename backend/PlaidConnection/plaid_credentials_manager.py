@@ -4,8 +4,9 @@ from firebase_admin import credentials, firestore, db
 from cryptography.fernet import Fernet
 import os
 from functools import lru_cache
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 import sys
+import threading
 from pathlib import Path
 from plaid.api import plaid_api
 from plaid.api_client import ApiClient
@@ -17,6 +18,22 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from EncryptionKeyStorage.API_key_manager import APIKeyManager
+from Caching.ttl_cache import TTLCache
+from StorageBackend.storage_backend import get_storage_backend
+
+PLAID_HOST = 'https://sandbox.plaid.com'
+
+# Max keep-alive connections the shared Plaid client holds open to the Plaid host.
+# Should cover the concurrent profile fetches in plaid_data_service.
+PLAID_CONNECTION_POOL_SIZE = int(os.environ.get('PLAID_CONNECTION_POOL_SIZE', 16))
+
+# Decrypted access tokens are kept in memory briefly so the several Plaid calls in
+# one chat turn don't each repeat the Firestore read and Fernet decrypt.
+# Storing or removing a token only clears this process's cache: other workers can
+# keep using the old (possibly removed) token for up to ACCESS_TOKEN_CACHE_TTL
+# seconds after a relink or unlink, so keep it short.
+ACCESS_TOKEN_CACHE_SIZE = 1024
+ACCESS_TOKEN_CACHE_TTL = int(os.environ.get('ACCESS_TOKEN_CACHE_TTL', 30))  # seconds
 
 class PlaidCredentialsManager:
     _instance = None
@@ -31,16 +48,41 @@ class PlaidCredentialsManager:
         if self._initialized:
             return
             
-        # Initialize Firebase if not already initialized
-        if not firebase_admin._apps:
-            cred = credentials.Certificate('/Users/liambouayad/Documents/Documents/Sensitive_Data/fynnance-5031a-firebase-adminsdk-9mn1g-87d7537a7c.json')
-            firebase_admin.initialize_app(cred)
-        
-        self.db = firestore.client()
+        self.db = get_storage_backend().client()
         self.api_key_manager = APIKeyManager()
         self.fernet = self.api_key_manager.fernet
+        self._plaid_client = None
+        self._plaid_client_lock = threading.Lock()
+        self._access_token_cache = TTLCache(maxsize=ACCESS_TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_CACHE_TTL)
+        self._token_retired_listeners: List[Callable[[str], None]] = []
         self._initialized = True
 
+    def add_token_retired_listener(self, callback: Callable[[str], None]) -> None:
+        """
+        Register a callback run with a user's old access token after it is removed or
+        replaced, so per-item state kept for it (e.g. synced transactions) can be dropped.
+        Only this process's callbacks run.
+        """
+        self._token_retired_listeners.append(callback)
+
+    def _current_access_token(self, user_id: str) -> Optional[str]:
+        if not self._token_retired_listeners:
+            return None
+        try:
+            result = self.get_user_access_token(user_id)
+        except Exception:
+            return None
+        return result[0] if result else None
+
+    def _retire_access_token(self, access_token: Optional[str]) -> None:
+        if access_token is None:
+            return
+        for callback in self._token_retired_listeners:
+            try:
+                callback(access_token)
+            except Exception as e:
+                print(f"Error releasing data for a retired access token: {str(e)}")
+
     def get_plaid_credentials(self) -> Tuple[str, str]:
         """Get Plaid client ID and secret."""
         try:
@@ -62,6 +104,8 @@ class PlaidCredentialsManager:
             item_id: Optional Plaid item ID associated with the access token
         """
         try:
+            previous_token = self._current_access_token(user_id)
+            
             # Encrypt the access token using Fernet
             encrypted_token = self.fernet.encrypt(access_token.encode()).decode()
             
@@ -85,6 +129,9 @@ class PlaidCredentialsManager:
                 'last_plaid_update': firestore.SERVER_TIMESTAMP
             })
             batch.commit()
+            self._access_token_cache.invalidate(user_id)
+            if previous_token != access_token:
+                self._retire_access_token(previous_token)
             
             print(f"Successfully stored encrypted access token for user '{user_id}'")
             
@@ -95,6 +142,7 @@ class PlaidCredentialsManager:
     def get_user_access_token(self, user_id: str) -> Optional[Tuple[str, str]]:
         """
         Retrieve and decrypt a user's Plaid access token from Firestore.
+        Decrypted tokens are served from a short-lived in-memory cache when possible.
         
         Args:
             user_id: The unique identifier for the user (e.g., Firebase Auth UID)
@@ -102,6 +150,10 @@ class PlaidCredentialsManager:
         Returns:
             Optional[Tuple[str, str]]: A tuple of (access_token, item_id) if found, None otherwise
         """
+        cached = self._access_token_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
             # Get the encrypted token from Firestore
             plaid_data_ref = self.db.collection('users').document(user_id).collection('plaid_data').document('access_tokens')
@@ -124,6 +176,7 @@ class PlaidCredentialsManager:
             
             print(f"Successfully retrieved and decrypted access token for user '{user_id}'")
             
+            self._access_token_cache.set(user_id, (access_token, item_id))
             return access_token, item_id
             
         except Exception as e:
@@ -138,6 +191,8 @@ class PlaidCredentialsManager:
             user_id: The unique identifier for the user
         """
         try:
+            previous_token = self._current_access_token(user_id)
+            
             # Get references to the documents
             user_ref = self.db.collection('users').document(user_id)
             plaid_data_ref = user_ref.collection('plaid_data').document('access_tokens')
@@ -150,6 +205,8 @@ class PlaidCredentialsManager:
                 'last_plaid_update': firestore.SERVER_TIMESTAMP
             })
             batch.commit()
+            self._access_token_cache.invalidate(user_id)
+            self._retire_access_token(previous_token)
             
             print(f"Successfully removed Plaid access token for user '{user_id}'")
             
@@ -157,19 +214,38 @@ class PlaidCredentialsManager:
             print(f"Error removing access token: {str(e)}")
             raise
 
-    def create_plaid_client(self) -> plaid_api.PlaidApi:
-        """Create a Plaid API client with the given credentials."""
+    def get_access_token_cache_stats(self) -> dict:
+        """Get hit/miss counters and size of the decrypted access token cache."""
+        return self._access_token_cache.stats()
+
+    def create_plaid_client(self, pool_size: int = PLAID_CONNECTION_POOL_SIZE) -> plaid_api.PlaidApi:
+        """Create a new Plaid API client with the given credentials."""
         client_id, secret = self.get_plaid_credentials()
         configuration = Configuration(
-            host='https://sandbox.plaid.com',
+            host=PLAID_HOST,
             api_key={
                 'clientId': client_id,
                 'secret': secret,
             }
         )
+        configuration.connection_pool_maxsize = pool_size
         api_client = ApiClient(configuration)
         return plaid_api.PlaidApi(api_client)
 
+    def get_plaid_client(self) -> plaid_api.PlaidApi:
+        """
+        Get the process-wide Plaid API client.
+        
+        The client is built once and shared, so its connection pool keeps
+        connections to Plaid alive across requests instead of doing a new TLS
+        handshake per call. The underlying urllib3 pool is thread-safe.
+        """
+        if self._plaid_client is None:
+            with self._plaid_client_lock:
+                if self._plaid_client is None:
+                    self._plaid_client = self.create_plaid_client()
+        return self._plaid_client
+
 if __name__ == "__main__":
     # Test the manager with a dummy token
     PROJECT_ID = "258766016727"
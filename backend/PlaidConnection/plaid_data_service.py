@@ -10,122 +10,244 @@ from plaid.configuration import Configuration
 from plaid.model.accounts_get_request import AccountsGetRequest
 from plaid.model.investments_holdings_get_request import InvestmentsHoldingsGetRequest
 from plaid.model.transactions_get_request import TransactionsGetRequest
+from plaid.model.transactions_get_request_options import TransactionsGetRequestOptions
+from plaid.model.transactions_sync_request import TransactionsSyncRequest
+from plaid.model.transactions_sync_request_options import TransactionsSyncRequestOptions
 from plaid.model.liabilities_get_request import LiabilitiesGetRequest
-from plaid_credentials_manager import PlaidCredentialsManager
+from PlaidConnection.plaid_credentials_manager import PlaidCredentialsManager
+from PlaidConnection.transaction_table import TransactionTable
+from PlaidConnection.transaction_file_store import TransactionFileStore, item_key
+from Caching.ttl_cache import TTLCache
 from flask import session
 from datetime import datetime, timedelta, date
 from functools import wraps
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator
 import numpy as np
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import json
+import os
+import threading
 import time
 
 # Initialize the credentials manager (Singleton)
 credentials_manager = PlaidCredentialsManager()
 
-def _analyze_recurring_transactions(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+# Days of history requested when an item's transactions are first synced.
+# Link tokens request the same window (see user_data_api.create_link_token).
+TRANSACTIONS_SYNC_DAYS_REQUESTED = 730
+
+# Local transaction store for incremental /transactions/sync, keyed by access token
+# (one access token per Plaid item). Each entry holds the item's sync cursor and its
+# transactions keyed by transaction_id, so repeat calls only pull new deltas.
+# Every worker process keeps its own store, so it is bounded: the least recently used
+# items are dropped past TRANSACTION_STORE_MAX_ITEMS, and items unused for
+# TRANSACTION_STORE_IDLE_TTL seconds expire. A dropped item is resynced (or reloaded
+# from the on-disk store) on next use. Items whose token is removed or replaced are
+# dropped straight away.
+TRANSACTION_STORE_MAX_ITEMS = int(os.environ.get('TRANSACTION_STORE_MAX_ITEMS', 256))
+TRANSACTION_STORE_IDLE_TTL = float(os.environ.get('TRANSACTION_STORE_IDLE_TTL', 1800))
+_transaction_store = TTLCache(maxsize=TRANSACTION_STORE_MAX_ITEMS, ttl=TRANSACTION_STORE_IDLE_TTL)
+_transaction_store_lock = threading.Lock()
+
+# Optional on-disk copy of the transaction store (see transaction_file_store), shared by
+# API processes and background workers. Off unless TRANSACTION_STORE_DIR is set; names and
+# ids are encrypted with the app's Fernet key, but amounts and dates are stored in plain
+# form, so only point it at a private, encrypted volume.
+TRANSACTION_STORE_DIR = os.environ.get('TRANSACTION_STORE_DIR')
+_file_store = TransactionFileStore(TRANSACTION_STORE_DIR, credentials_manager.fernet) if TRANSACTION_STORE_DIR else None
+
+# Page size for paginated /transactions/get fetches (Plaid's maximum is 500)
+TRANSACTIONS_PAGE_SIZE = 500
+
+# Lookback window kept up to date by each item's RecurringPaymentDetector
+RECURRING_LOOKBACK_DAYS = 180
+
+# Backoff schedule (seconds) used only while Plaid is still preparing a newly linked
+# item's transactions. Once an item has returned data it is flagged ready and never waits.
+PRODUCT_NOT_READY_BACKOFF = (0.5, 1, 2, 4)
+
+# Bounded pool used to fetch the sections of a financial profile concurrently
+PROFILE_FETCH_WORKERS = 16
+PROFILE_SECTION_TIMEOUT = 20  # seconds
+_profile_executor = ThreadPoolExecutor(max_workers=PROFILE_FETCH_WORKERS, thread_name_prefix='plaid-profile')
+
+# Profile response fields -> the Plaid sections each one needs
+PROFILE_FIELD_SECTIONS = {
+    'accounts': ('accounts',),
+    'balances': ('accounts',),
+    'investments': ('investments',),
+    'liabilities': ('liabilities',),
+    'transactions': ('transactions',),
+    'summary': ('transactions',),
+}
+MAX_TRANSACTIONS_PAGE_SIZE = 500
+
+class ProductNotReadyError(Exception):
+    """Raised when Plaid has not finished preparing an item's transactions."""
+
+_EPOCH = date(1970, 1, 1)
+
+def _build_recurring_payment(
+    name: str,
+    category: str,
+    occurrences: int,
+    amount_mean: float,
+    amount_variance: float,
+    avg_interval: float,
+    interval_variance: float,
+    last_date: date,
+    history: List[tuple],
+    today: date
+) -> Dict[str, Any]:
     """
-    Analyze transactions to identify recurring payment patterns.
+    Build the summary for one merchant that passed the recurring thresholds.
     
     Args:
-        transactions: List of transaction dictionaries with at least:
-                     - date
-                     - amount
-                     - name/merchant_name
-                     - category
+        amount_variance: Coefficient of variation of the payment amounts
+        interval_variance: Coefficient of variation of the days between payments
+        history: (date, amount) pairs of the most recent payments, oldest first
+    """
+    # Determine frequency based on average interval
+    frequency = (
+        'monthly' if 25 <= avg_interval <= 35 else
+        'weekly' if 5 <= avg_interval <= 9 else
+        'biweekly' if 12 <= avg_interval <= 16 else
+        'quarterly' if 85 <= avg_interval <= 95 else
+        'unknown'
+    )
     
-    Returns:
-        Dictionary containing recurring payment analysis
+    # Calculate confidence score based on:
+    # - Amount consistency
+    # - Interval consistency
+    # - Number of occurrences (more occurrences = higher confidence)
+    # - Recent activity (more recent = higher confidence)
+    amount_confidence = 1 - min(amount_variance, 1)
+    interval_confidence = 1 - min(interval_variance, 1)
+    occurrence_confidence = min(occurrences / 12, 1)  # Max out at 12 occurrences
+    
+    days_since_last = (today - last_date).days
+    recency_confidence = max(0, 1 - (days_since_last / 180))  # Decay over 6 months
+    
+    confidence = (
+        amount_confidence * 0.4 +
+        interval_confidence * 0.3 +
+        occurrence_confidence * 0.2 +
+        recency_confidence * 0.1
+    )
+    
+    # Predict next payment date
+    next_payment = last_date + timedelta(days=round(avg_interval))
+    
+    return {
+        'name': name,
+        'amount': round(amount_mean, 2),
+        'frequency': frequency,
+        'category': category,
+        'last_payment': last_date.isoformat(),
+        'next_payment': next_payment.isoformat(),
+        'confidence': round(confidence, 3),
+        'occurrences': occurrences,
+        'average_interval_days': round(avg_interval, 1),
+        'amount_consistency': round(amount_confidence, 3),
+        'timing_consistency': round(interval_confidence, 3),
+        'payment_history': [
+            {
+                'date': payment_date.isoformat(),
+                'amount': round(amount, 2)
+            }
+            for payment_date, amount in history
+        ]
+    }
+
+def _detect_recurring_payments(transactions) -> List[Dict[str, Any]]:
+    """
+    Find recurring payments with a single columnar sort-and-reduce pass.
+    
+    Merchants are encoded as integer codes (in order of first appearance) and dates as
+    day numbers, then rows are sorted by (merchant, date) so every merchant is a
+    contiguous run. Amount and interval statistics for all merchants are computed at
+    once from that layout; only merchants that qualify as recurring are turned back
+    into dictionaries.
+    
+    transactions may be a TransactionTable, whose columns are used as-is, or any
+    iterable of transaction dicts (e.g. a stream of fetched pages), which is read once
+    into a table.
     """
-    # Group transactions by merchant/description
-    merchant_transactions = defaultdict(list)
-    for transaction in transactions:
-        key = transaction.get('merchant_name') or transaction['name']
-        merchant_transactions[key].append({
-            'date': datetime.strptime(transaction['date'], '%Y-%m-%d'),
-            'amount': abs(transaction['amount']),  # Use absolute value for consistency
-            'category': transaction.get('category', ['uncategorized'])[0]
-        })
+    if not isinstance(transactions, TransactionTable):
+        transactions = TransactionTable.from_records(transactions, sort=False)
+    table = transactions
+    if not len(table):
+        return []
+    
+    days = table.days.astype(np.int64)
+    amounts = np.abs(table.amounts)
+    
+    # Integer merchant codes, numbered by first appearance
+    merchant_ids, first_index, codes = np.unique(table.key_codes, return_index=True, return_inverse=True)
+    appearance = np.argsort(first_index)
+    rank = np.empty_like(appearance)
+    rank[appearance] = np.arange(len(appearance))
+    codes = rank[codes.ravel()]
+    merchant_ids = merchant_ids[appearance]
+    num_merchants = len(merchant_ids)
+    
+    # Stable sort by (merchant, date) so each merchant is one contiguous, dated run
+    order = np.lexsort((days, codes))
+    codes = codes[order]
+    days = days[order]
+    amounts = amounts[order]
+    
+    counts = np.bincount(codes, minlength=num_merchants)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    
+    # Amount mean and (population) standard deviation per merchant
+    amount_mean = np.bincount(codes, weights=amounts, minlength=num_merchants) / counts
+    amount_sq_dev = (amounts - amount_mean[codes]) ** 2
+    amount_std = np.sqrt(np.bincount(codes, weights=amount_sq_dev, minlength=num_merchants) / counts)
+    
+    # Day intervals between consecutive payments of the same merchant
+    same_merchant = codes[1:] == codes[:-1]
+    interval_codes = codes[1:][same_merchant]
+    intervals = np.diff(days)[same_merchant].astype(np.float64)
+    interval_counts = counts - 1
     
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interval_mean = np.bincount(interval_codes, weights=intervals, minlength=num_merchants) / interval_counts
+        interval_sq_dev = (intervals - interval_mean[interval_codes]) ** 2
+        interval_std = np.sqrt(np.bincount(interval_codes, weights=interval_sq_dev, minlength=num_merchants) / interval_counts)
+        amount_variance = np.where(amount_mean > 0, amount_std / amount_mean, np.inf)
+        interval_variance = np.where(interval_mean > 0, interval_std / interval_mean, np.inf)
+    
+    # Need at least 2 transactions to detect a pattern, then check consistency thresholds
+    is_recurring = (counts >= 2) & (amount_variance < 0.1) & (interval_variance < 0.3)  # Adjust thresholds as needed
+    
+    today = datetime.now().date()
     recurring_payments = []
-    for merchant, trans in merchant_transactions.items():
-        if len(trans) < 2:  # Need at least 2 transactions to detect pattern
-            continue
-        
-        # Sort transactions by date
-        trans.sort(key=lambda x: x['date'])
-        
-        # Check for consistent amount
-        amounts = [t['amount'] for t in trans]
-        amount_mean = np.mean(amounts)
-        amount_std = np.std(amounts)
-        amount_variance = amount_std / amount_mean if amount_mean > 0 else float('inf')
-        
-        # Check for regular intervals
-        intervals = [(trans[i+1]['date'] - trans[i]['date']).days for i in range(len(trans)-1)]
-        if not intervals:
-            continue
-            
-        interval_mean = np.mean(intervals)
-        interval_std = np.std(intervals)
-        interval_variance = interval_std / interval_mean if interval_mean > 0 else float('inf')
-        
-        # Determine if recurring based on consistency thresholds
-        if amount_variance < 0.1 and interval_variance < 0.3:  # Adjust thresholds as needed
-            # Determine frequency based on average interval
-            avg_interval = np.mean(intervals)
-            frequency = (
-                'monthly' if 25 <= avg_interval <= 35 else
-                'weekly' if 5 <= avg_interval <= 9 else
-                'biweekly' if 12 <= avg_interval <= 16 else
-                'quarterly' if 85 <= avg_interval <= 95 else
-                'unknown'
-            )
-            
-            # Calculate confidence score based on:
-            # - Amount consistency
-            # - Interval consistency
-            # - Number of occurrences (more occurrences = higher confidence)
-            # - Recent activity (more recent = higher confidence)
-            amount_confidence = 1 - min(amount_variance, 1)
-            interval_confidence = 1 - min(interval_variance, 1)
-            occurrence_confidence = min(len(trans) / 12, 1)  # Max out at 12 occurrences
-            
-            days_since_last = (datetime.now().date() - trans[-1]['date'].date()).days
-            recency_confidence = max(0, 1 - (days_since_last / 180))  # Decay over 6 months
-            
-            confidence = (
-                amount_confidence * 0.4 +
-                interval_confidence * 0.3 +
-                occurrence_confidence * 0.2 +
-                recency_confidence * 0.1
-            )
-            
-            # Predict next payment date
-            last_date = trans[-1]['date']
-            next_payment = last_date + timedelta(days=round(avg_interval))
-            
-            recurring_payments.append({
-                'name': merchant,
-                'amount': round(amount_mean, 2),
-                'frequency': frequency,
-                'category': trans[0]['category'],
-                'last_payment': last_date.date().isoformat(),
-                'next_payment': next_payment.date().isoformat(),
-                'confidence': round(confidence, 3),
-                'occurrences': len(trans),
-                'average_interval_days': round(avg_interval, 1),
-                'amount_consistency': round(amount_confidence, 3),
-                'timing_consistency': round(interval_confidence, 3),
-                'payment_history': [
-                    {
-                        'date': t['date'].date().isoformat(),
-                        'amount': round(t['amount'], 2)
-                    }
-                    for t in trans[-3:]  # Include last 3 payments
-                ]
-            })
+    for code in np.flatnonzero(is_recurring):
+        start, end = starts[code], ends[code]
+        recurring_payments.append(_build_recurring_payment(
+            name=table.strings.values[merchant_ids[code]],
+            category=table.primary_category(table.category_codes[order[start]]),
+            occurrences=int(counts[code]),
+            amount_mean=amount_mean[code],
+            amount_variance=amount_variance[code],
+            avg_interval=interval_mean[code],
+            interval_variance=interval_variance[code],
+            last_date=_EPOCH + timedelta(days=int(days[end - 1])),
+            history=[
+                (_EPOCH + timedelta(days=int(days[i])), float(amounts[i]))
+                for i in range(max(start, end - 3), end)  # Include last 3 payments
+            ],
+            today=today
+        ))
     
+    return recurring_payments
+
+def _summarize_recurring_payments(recurring_payments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sort detected recurring payments by confidence and add category summaries."""
     # Sort by confidence
     recurring_payments.sort(key=lambda x: x['confidence'], reverse=True)
     
@@ -157,6 +279,189 @@ def _analyze_recurring_transactions(transactions: List[Dict[str, Any]]) -> Dict[
         }
     }
 
+def _analyze_recurring_transactions(transactions) -> Dict[str, Any]:
+    """
+    Analyze transactions to identify recurring payment patterns.
+    
+    Args:
+        transactions: TransactionTable, or iterable of transaction dictionaries with at least:
+                     - date
+                     - amount
+                     - name/merchant_name
+                     - category
+    
+    Returns:
+        Dictionary containing recurring payment analysis
+    """
+    recurring_payments = _detect_recurring_payments(transactions)
+    return _summarize_recurring_payments(recurring_payments)
+
+class _MerchantStats:
+    """Running amount and interval statistics for one merchant's payments in the window."""
+
+    __slots__ = ('payments', 'amount_n', 'amount_mean', 'amount_m2', 'interval_n', 'interval_mean', 'interval_m2')
+
+    def __init__(self):
+        # (day, amount, category, transaction_id) sorted by day
+        self.payments = deque()
+        self.rebuild()
+
+    @staticmethod
+    def _add(n, mean, m2, value):
+        # Welford's online update
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        m2 += delta * (value - mean)
+        return n, mean, m2
+
+    @staticmethod
+    def _remove(n, mean, m2, value):
+        # Inverse of the Welford update
+        n -= 1
+        if n == 0:
+            return 0, 0.0, 0.0
+        delta = value - mean
+        mean -= delta / n
+        m2 -= delta * (value - mean)
+        return n, mean, max(m2, 0.0)
+
+    def rebuild(self):
+        """Recompute the statistics from the stored payments."""
+        self.amount_n, self.amount_mean, self.amount_m2 = 0, 0.0, 0.0
+        self.interval_n, self.interval_mean, self.interval_m2 = 0, 0.0, 0.0
+        previous_day = None
+        for day, amount, _, _ in self.payments:
+            self.amount_n, self.amount_mean, self.amount_m2 = self._add(
+                self.amount_n, self.amount_mean, self.amount_m2, amount)
+            if previous_day is not None:
+                self.interval_n, self.interval_mean, self.interval_m2 = self._add(
+                    self.interval_n, self.interval_mean, self.interval_m2, day - previous_day)
+            previous_day = day
+
+    def append(self, payment):
+        """Add a payment, in O(1) when it is not older than the latest one."""
+        if self.payments and payment[0] < self.payments[-1][0]:
+            self.payments.append(payment)
+            self.payments = deque(sorted(self.payments, key=lambda p: p[0]))
+            self.rebuild()
+            return
+        if self.payments:
+            self.interval_n, self.interval_mean, self.interval_m2 = self._add(
+                self.interval_n, self.interval_mean, self.interval_m2, payment[0] - self.payments[-1][0])
+        self.amount_n, self.amount_mean, self.amount_m2 = self._add(
+            self.amount_n, self.amount_mean, self.amount_m2, payment[1])
+        self.payments.append(payment)
+
+    def discard(self, transaction_id: str):
+        """Remove a modified or deleted payment."""
+        self.payments = deque(p for p in self.payments if p[3] != transaction_id)
+        self.rebuild()
+
+    def evict_before(self, start_day: int) -> List[str]:
+        """Drop payments that fell out of the lookback window and return their transaction_ids."""
+        evicted = []
+        while self.payments and self.payments[0][0] < start_day:
+            day, amount, _, transaction_id = self.payments.popleft()
+            evicted.append(transaction_id)
+            self.amount_n, self.amount_mean, self.amount_m2 = self._remove(
+                self.amount_n, self.amount_mean, self.amount_m2, amount)
+            if self.payments:
+                self.interval_n, self.interval_mean, self.interval_m2 = self._remove(
+                    self.interval_n, self.interval_mean, self.interval_m2, self.payments[0][0] - day)
+        return evicted
+
+class RecurringPaymentDetector:
+    """
+    Incremental recurring-payment detector for one Plaid item.
+    
+    Keeps running per-merchant statistics (count, mean/variance of amount and of the
+    days between payments, last date) over a rolling lookback window. Transaction
+    deltas from /transactions/sync update it in O(new transactions), and analyze()
+    answers from the running statistics without rescanning history. Thresholds and
+    scoring are the same as _analyze_recurring_transactions.
+    """
+
+    def __init__(self, lookback_days: int = 180):
+        self.lookback_days = lookback_days
+        self._merchants: Dict[str, _MerchantStats] = {}
+        # transaction_id -> merchant key, for modified and removed transactions
+        self._index: Dict[str, str] = {}
+
+    def _window_start(self, today: date) -> int:
+        return (today - timedelta(days=self.lookback_days) - _EPOCH).days
+
+    def _discard(self, transaction_id: str):
+        key = self._index.pop(transaction_id, None)
+        stats = self._merchants.get(key) if key is not None else None
+        if stats is not None:
+            stats.discard(transaction_id)
+
+    def update(self, added: List[tuple], modified: List[tuple], removed: List[str]):
+        """
+        Apply one batch of transaction deltas.
+        
+        Args:
+            added: (transaction_id, transaction) pairs of new transactions
+            modified: (transaction_id, transaction) pairs of changed transactions
+            removed: transaction_ids of deleted transactions
+        """
+        for transaction_id in removed:
+            self._discard(transaction_id)
+        for transaction_id, _ in modified:
+            self._discard(transaction_id)
+        
+        start_day = self._window_start(datetime.now().date())
+        for transaction_id, trans in sorted(added + modified, key=lambda item: str(item[1]['date'])):
+            day = (date.fromisoformat(str(trans['date'])) - _EPOCH).days
+            if day < start_day:
+                continue
+            key = trans.get('merchant_name') or trans['name']
+            category = (trans.get('category') or ['uncategorized'])[0]
+            stats = self._merchants.get(key)
+            if stats is None:
+                stats = self._merchants[key] = _MerchantStats()
+            stats.append((day, abs(trans['amount']), category, transaction_id))
+            self._index[transaction_id] = key
+
+    def analyze(self) -> Dict[str, Any]:
+        """Get the recurring payment analysis for the current lookback window."""
+        today = datetime.now().date()
+        start_day = self._window_start(today)
+        
+        recurring_payments = []
+        for key, stats in list(self._merchants.items()):
+            for transaction_id in stats.evict_before(start_day):
+                self._index.pop(transaction_id, None)
+            if not stats.payments:
+                del self._merchants[key]
+                continue
+            if stats.amount_n < 2:
+                continue
+            
+            amount_std = np.sqrt(stats.amount_m2 / stats.amount_n)
+            interval_std = np.sqrt(stats.interval_m2 / stats.interval_n)
+            amount_variance = amount_std / stats.amount_mean if stats.amount_mean > 0 else float('inf')
+            interval_variance = interval_std / stats.interval_mean if stats.interval_mean > 0 else float('inf')
+            if not (amount_variance < 0.1 and interval_variance < 0.3):
+                continue
+            
+            recent = list(stats.payments)[-3:]
+            recurring_payments.append(_build_recurring_payment(
+                name=key,
+                category=stats.payments[0][2],
+                occurrences=stats.amount_n,
+                amount_mean=stats.amount_mean,
+                amount_variance=amount_variance,
+                avg_interval=stats.interval_mean,
+                interval_variance=interval_variance,
+                last_date=_EPOCH + timedelta(days=stats.payments[-1][0]),
+                history=[(_EPOCH + timedelta(days=day), amount) for day, amount, _, _ in recent],
+                today=today
+            ))
+        
+        return _summarize_recurring_payments(recurring_payments)
+
 def get_current_user_id() -> str:
     """Get the current user's Firebase Auth UID from the session."""
     if 'firebase_user_id' not in session:
@@ -168,11 +473,10 @@ def get_plaid_data(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            # Get current user's Firebase Auth UID from session
-            firebase_user_id = get_current_user_id()
-            
             # Get user's access token if not provided
             if 'access_token' not in kwargs:
+                # Get current user's Firebase Auth UID from session
+                firebase_user_id = get_current_user_id()
                 result = credentials_manager.get_user_access_token(firebase_user_id)
                 if not result:
                     raise ValueError("No Plaid access token found for user")
@@ -181,7 +485,7 @@ def get_plaid_data(func):
             
             # Get Plaid client if not provided
             if 'plaid_client' not in kwargs:
-                kwargs['plaid_client'] = credentials_manager.create_plaid_client()
+                kwargs['plaid_client'] = credentials_manager.get_plaid_client()
             
             # Call the actual function with the prepared data
             return func(*args, **kwargs)
@@ -250,35 +554,303 @@ def get_investment_holdings(plaid_client: plaid_api.PlaidApi, access_token: str)
             'error': str(e)
         }
 
-@get_plaid_data
-def get_transactions(plaid_client: plaid_api.PlaidApi, access_token: str, start_date: datetime = None, end_date: datetime = None) -> List[Dict[str, Any]]:
-    """Get transaction data for the current user."""
-    time.sleep(3)
-    try:
-        if start_date is None:
-            start_date = datetime.now() - timedelta(days=30)
-        if end_date is None:
-            end_date = datetime.now()
+def _format_transaction(trans) -> Dict[str, Any]:
+    """Reduce a Plaid transaction to the fields used across the backend."""
+    return {
+        'date': trans['date'],
+        'name': trans['name'],
+        'amount': trans['amount'],
+        'category': trans.get('category', []),
+        'merchant_name': trans.get('merchant_name')
+    }
+
+def _get_store_entry(access_token: str) -> Dict[str, Any]:
+    """Get (or create) the local sync state for the item behind an access token."""
+    with _transaction_store_lock:
+        entry = _transaction_store.get(access_token)
+        if entry is None:
+            entry = {
+                'cursor': None,
+                'transactions': {},
+                # Date-sorted TransactionTable of 'transactions', rebuilt lazily after a sync changes them
+                'table': None,
+                'ready': False,
+                'recurring': RecurringPaymentDetector(RECURRING_LOOKBACK_DAYS),
+                'lock': threading.Lock()
+            }
+        # Setting it again renews the item's idle TTL
+        _transaction_store.set(access_token, entry)
+        return entry
+
+def forget_item(access_token: str) -> None:
+    """Drop everything stored locally for an item (called when its access token is retired)."""
+    _transaction_store.invalidate(access_token)
+    if _file_store is not None:
+        _file_store.delete(item_key(access_token))
+
+credentials_manager.add_token_retired_listener(forget_item)
+
+def _is_product_not_ready(error: Exception) -> bool:
+    """Check whether an error means the item's transactions are not ready yet."""
+    if isinstance(error, ProductNotReadyError):
+        return True
+    return 'PRODUCT_NOT_READY' in str(getattr(error, 'body', ''))
+
+def _fetch_when_ready(access_token: str, fetch):
+    """
+    Call fetch(), retrying with bounded exponential backoff while the item is not ready.
+    
+    Items already known to be ready are fetched directly, so established items
+    never wait. The readiness flag is cached on the item's store entry.
+    """
+    entry = _get_store_entry(access_token)
+    if entry['ready']:
+        return fetch()
+    
+    for delay in PRODUCT_NOT_READY_BACKOFF:
+        try:
+            result = fetch()
+            break
+        except Exception as e:
+            if not _is_product_not_ready(e):
+                raise
+            time.sleep(delay)
+    else:
+        # Last attempt after the final backoff; let any error propagate
+        result = fetch()
+    
+    entry['ready'] = True
+    return result
+
+def _sync_item(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict[str, Any]:
+    """
+    Bring the local transaction store for an item up to date using /transactions/sync.
+    
+    Only the added/modified/removed deltas since the item's last cursor are downloaded.
+    Deltas are applied once every page has been received, so a failed sync leaves the
+    store and cursor untouched. The same deltas are fed to the item's recurring
+    payment detector and, when enabled, appended to the on-disk store.
+    
+    Returns:
+        The item's store entry
+    """
+    entry = _get_store_entry(access_token)
+    with entry['lock']:
+        if entry['cursor'] is None and _file_store is not None:
+            # Resume from history another process (or an earlier run) already synced
+            stored, stored_cursor = _file_store.read_sync_state(item_key(access_token))
+            if stored_cursor:
+                entry['transactions'] = stored
+                entry['recurring'].update(list(stored.items()), [], [])
+                entry['table'] = None
+                entry['cursor'] = stored_cursor
+                entry['ready'] = True
+        
+        cursor = entry['cursor']
+        added, modified, removed = [], [], []
+        has_more = True
+        while has_more:
+            request_args = {
+                'access_token': access_token,
+                'options': TransactionsSyncRequestOptions(
+                    include_personal_finance_category=True,
+                    days_requested=TRANSACTIONS_SYNC_DAYS_REQUESTED
+                )
+            }
+            if cursor:
+                request_args['cursor'] = cursor
             
-        start_date = start_date.date() if isinstance(start_date, datetime) else start_date
-        end_date = end_date.date() if isinstance(end_date, datetime) else end_date
+            try:
+                response = plaid_client.transactions_sync(TransactionsSyncRequest(**request_args))
+            except Exception as e:
+                # Plaid asks us to restart pagination from the original cursor if the
+                # item's data changed while we were paging through it.
+                if 'TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION' in str(getattr(e, 'body', '')):
+                    cursor = entry['cursor']
+                    added, modified, removed = [], [], []
+                    continue
+                raise
+            
+            added.extend(response['added'])
+            modified.extend(response['modified'])
+            removed.extend(response['removed'])
+            has_more = response['has_more']
+            cursor = response['next_cursor']
+        
+        if str(response.get('transactions_update_status')) == 'NOT_READY':
+            raise ProductNotReadyError("Transactions are not ready yet for this item")
+        
+        added = [(trans['transaction_id'], _format_transaction(trans)) for trans in added]
+        modified = [(trans['transaction_id'], _format_transaction(trans)) for trans in modified]
+        removed = [trans['transaction_id'] for trans in removed]
         
+        transactions = entry['transactions']
+        transactions.update(added)
+        transactions.update(modified)
+        for transaction_id in removed:
+            transactions.pop(transaction_id, None)
+        entry['recurring'].update(added, modified, removed)
+        if added or modified or removed:
+            entry['table'] = None
+        if _file_store is not None and (added or modified or removed or cursor != entry['cursor']):
+            _file_store.append(item_key(access_token), added, modified, removed, cursor)
+        entry['cursor'] = cursor
+        
+        return entry
+
+def sync_transactions(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Sync an item's transactions incrementally (see _sync_item).
+    
+    Args:
+        plaid_client: The Plaid API client
+        access_token: The item's access token
+    
+    Returns:
+        The item's transactions keyed by transaction_id
+    """
+    entry = _sync_item(plaid_client, access_token)
+    with entry['lock']:
+        return dict(entry['transactions'])
+
+def _to_date(value) -> date:
+    """Normalize a datetime, date or YYYY-MM-DD string (as passed by the chat tools) to a date."""
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d')
+    return value.date() if isinstance(value, datetime) else value
+
+def iter_transaction_pages(
+    plaid_client: plaid_api.PlaidApi,
+    access_token: str,
+    start_date: date,
+    end_date: date,
+    page_size: int = TRANSACTIONS_PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Fetch a transaction window from /transactions/get page by page.
+    
+    Pages are yielded as they arrive, so consumers can process long lookbacks as a
+    stream with bounded memory instead of waiting for (and holding) the full window.
+    Paging continues until Plaid's total_transactions count has been reached.
+    
+    Args:
+        plaid_client: The Plaid API client
+        access_token: The item's access token
+        start_date: First day of the window
+        end_date: Last day of the window
+        page_size: Transactions per request (at most 500)
+    
+    Yields:
+        Lists of formatted transactions, newest first
+    """
+    offset = 0
+    while True:
         request = TransactionsGetRequest(
             access_token=access_token,
             start_date=start_date,
             end_date=end_date,
-            options={"include_personal_finance_category": True}
+            options=TransactionsGetRequestOptions(
+                count=page_size,
+                offset=offset,
+                include_personal_finance_category=True
+            )
+        )
+        response = _fetch_when_ready(
+            access_token,
+            lambda: plaid_client.transactions_get(request)
         )
         
-        response = plaid_client.transactions_get(request)
+        page = [_format_transaction(trans) for trans in response.get('transactions', [])]
+        if not page:
+            return
+        yield page
         
-        return [{
-            'date': trans['date'],
-            'name': trans['name'],
-            'amount': trans['amount'],
-            'category': trans.get('category', []),
-            'merchant_name': trans.get('merchant_name')
-        } for trans in response.get('transactions', [])]
+        offset += len(page)
+        if offset >= response['total_transactions']:
+            return
+
+def _load_transaction_table(
+    plaid_client: plaid_api.PlaidApi,
+    access_token: str,
+    start_date=None,
+    end_date=None,
+    incremental: bool = True
+) -> TransactionTable:
+    """
+    Load a transaction window as a TransactionTable (see get_transactions).
+    
+    Incremental loads slice the item's cached, date-sorted store table without copying.
+    """
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=30)
+    if end_date is None:
+        end_date = datetime.now()
+    
+    start_date = _to_date(start_date)
+    end_date = _to_date(end_date)
+    
+    sync_history_start = datetime.now().date() - timedelta(days=TRANSACTIONS_SYNC_DAYS_REQUESTED)
+    if incremental and start_date >= sync_history_start:
+        entry = _fetch_when_ready(
+            access_token,
+            lambda: _sync_item(plaid_client, access_token)
+        )
+        with entry['lock']:
+            if entry['table'] is None:
+                entry['table'] = TransactionTable.from_records(entry['transactions'].values())
+            table = entry['table']
+        return table.between(start_date, end_date)
+    
+    pages = iter_transaction_pages(plaid_client, access_token, start_date, end_date)
+    return TransactionTable.from_records(trans for page in pages for trans in page)
+
+def get_stored_transaction_table(access_token: str) -> TransactionTable:
+    """
+    Get an item's synced history from the on-disk store without any Plaid call.
+    
+    The columns are memory-mapped, so background workers can run analytics such as
+    _analyze_recurring_transactions or TransactionTable.totals_by_category over long
+    histories without loading them onto the heap.
+    """
+    if _file_store is None:
+        raise ValueError("On-disk transaction store is not enabled (set TRANSACTION_STORE_DIR)")
+    return _file_store.read_table(item_key(access_token))
+
+@get_plaid_data
+def get_transaction_table(
+    plaid_client: plaid_api.PlaidApi,
+    access_token: str,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    incremental: bool = True
+) -> TransactionTable:
+    """Get transaction data for the current user as a columnar TransactionTable."""
+    try:
+        return _load_transaction_table(plaid_client, access_token, start_date, end_date, incremental)
+    except Exception as e:
+        raise Exception(f"Error getting transactions: {str(e)}")
+
+@get_plaid_data
+def get_transactions(
+    plaid_client: plaid_api.PlaidApi,
+    access_token: str,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    incremental: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Get transaction data for the current user.
+    
+    By default the item's local transaction store is synced incrementally and the
+    requested window is served from it. Windows older than the synced history, or
+    incremental=False, fetch the whole window with paginated /transactions/get instead.
+    Newly linked items whose transactions are still being prepared are retried with
+    backoff (see _fetch_when_ready).
+    """
+    try:
+        table = _load_transaction_table(plaid_client, access_token, start_date, end_date, incremental)
+        # Match /transactions/get, which returns the newest transactions first
+        return table.to_records(newest_first=True)
         
     except Exception as e:
         raise Exception(f"Error getting transactions: {str(e)}")
@@ -287,12 +859,16 @@ def get_transactions(plaid_client: plaid_api.PlaidApi, access_token: str, start_
 def get_recurring_payments(
     plaid_client: plaid_api.PlaidApi, 
     access_token: str,
-    lookback_days: int = 180
+    lookback_days: int = RECURRING_LOOKBACK_DAYS
 ) -> Dict[str, Any]:
     """
     Analyze transaction history to identify and categorize recurring payments.
     Returns structured data about payment patterns.
     
+    For the default lookback the item's incremental detector answers from its running
+    statistics; other lookbacks analyze the transaction window from scratch, streaming
+    pages from Plaid when the window is older than the synced history.
+    
     Args:
         plaid_client: The Plaid API client
         access_token: The user's access token
@@ -302,16 +878,36 @@ def get_recurring_payments(
         Dictionary containing recurring payment analysis
     """
     try:
-        # Get transaction history
         start_date = (datetime.now() - timedelta(days=lookback_days))
-        transactions = get_transactions(
-            plaid_client=plaid_client,
-            access_token=access_token,
-            start_date=start_date
-        )
         
-        # Analyze recurring patterns
-        recurring_analysis = _analyze_recurring_transactions(transactions)
+        if lookback_days == RECURRING_LOOKBACK_DAYS:
+            entry = _fetch_when_ready(
+                access_token,
+                lambda: _sync_item(plaid_client, access_token)
+            )
+            with entry['lock']:
+                recurring_analysis = entry['recurring'].analyze()
+        elif lookback_days > TRANSACTIONS_SYNC_DAYS_REQUESTED:
+            # Stream the history page by page into the analysis
+            pages = iter_transaction_pages(
+                plaid_client,
+                access_token,
+                start_date.date(),
+                datetime.now().date()
+            )
+            recurring_analysis = _analyze_recurring_transactions(
+                trans for page in pages for trans in page
+            )
+        else:
+            # Get transaction history
+            transactions = _load_transaction_table(
+                plaid_client,
+                access_token,
+                start_date=start_date
+            )
+            
+            # Analyze recurring patterns
+            recurring_analysis = _analyze_recurring_transactions(transactions)
         
         return {
             **recurring_analysis,
@@ -326,9 +922,16 @@ def get_recurring_payments(
     except Exception as e:
         raise Exception(f"Error analyzing recurring payments: {str(e)}")
 
+def _money(amount) -> Optional[float]:
+    """Round a Plaid amount to cents (Plaid sends None for unknown amounts)."""
+    return round(float(amount), 2) if amount is not None else None
+
 @get_plaid_data
 def get_liabilities(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict[str, Any]:
-    """Get liability data including credit cards, student loans, and mortgages."""
+    """
+    Get liability data including credit cards, student loans, and mortgages.
+    Amounts are in dollars and rates in percent, as numbers.
+    """
     try:
         request = LiabilitiesGetRequest(access_token=access_token)
         response = plaid_client.liabilities_get(request)
@@ -352,11 +955,11 @@ def get_liabilities(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict
                 else:
                     subresponse['name'] = f"Credit Card (ID: {credit['account_id']})"
                     
-                subresponse['last_statement_balance'] = f"${credit['last_statement_balance']:,.2f}"
+                subresponse['last_statement_balance'] = _money(credit['last_statement_balance'])
                 if 'last_payment_amount' in credit:
-                    subresponse['last_payment_amount'] = f"${credit['last_payment_amount']:,.2f}"
+                    subresponse['last_payment_amount'] = _money(credit['last_payment_amount'])
                 if 'minimum_payment_amount' in credit:
-                    subresponse['minimum_payment_amount'] = f"${credit['minimum_payment_amount']:,.2f}"
+                    subresponse['minimum_payment_amount'] = _money(credit['minimum_payment_amount'])
                 if 'is_overdue' in credit:
                     subresponse['is_overdue'] = credit['is_overdue']
                 
@@ -364,8 +967,8 @@ def get_liabilities(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict
                 purchase_apr = next((apr for apr in credit['aprs'] 
                                    if apr['apr_type'] == 'purchase_apr'), None)
                 if purchase_apr:
-                    subresponse['purchase_apr'] = f"{purchase_apr['apr_percentage']}%"
-                    subresponse['balance_subject_to_apr'] = f"${purchase_apr['balance_subject_to_apr']:,.2f}"
+                    subresponse['purchase_apr'] = purchase_apr['apr_percentage']
+                    subresponse['balance_subject_to_apr'] = _money(purchase_apr['balance_subject_to_apr'])
                 
                 credit_responses.append(subresponse)
         else:
@@ -381,21 +984,21 @@ def get_liabilities(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict
                 
                 subresponse = {
                     'name': account_name,
-                    'last_statement_balance': f"${loan['last_statement_balance']:,.2f}"
+                    'last_statement_balance': _money(loan['last_statement_balance'])
                 }
                 
                 if 'last_payment_amount' in loan:
-                    subresponse['last_payment_amount'] = f"${loan['last_payment_amount']:,.2f}"
+                    subresponse['last_payment_amount'] = _money(loan['last_payment_amount'])
                 if 'minimum_payment_amount' in loan:
-                    subresponse['minimum_payment_amount'] = f"${loan['minimum_payment_amount']:,.2f}"
+                    subresponse['minimum_payment_amount'] = _money(loan['minimum_payment_amount'])
                 if 'loan_status' in loan:
                     subresponse['loan_status'] = loan['loan_status']['type']
                 if 'interest_rate_percentage' in loan:
-                    subresponse['interest_rate_percentage'] = f"{loan['interest_rate_percentage']}%"
+                    subresponse['interest_rate_percentage'] = loan['interest_rate_percentage']
                 if 'expected_payoff_date' in loan:
                     subresponse['expected_payoff_date'] = loan['expected_payoff_date']
                 if 'origination_principal_amount' in loan:
-                    subresponse['origination_principal_amount'] = f"${loan['origination_principal_amount']:,.2f}"
+                    subresponse['origination_principal_amount'] = _money(loan['origination_principal_amount'])
                 
                 student_responses.append(subresponse)
         else:
@@ -414,27 +1017,27 @@ def get_liabilities(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict
                 }
                 
                 if 'outstanding_principal_balance' in mortgage:
-                    subresponse['outstanding_principal_balance'] = f"${mortgage['outstanding_principal_balance']:,.2f}"
+                    subresponse['outstanding_principal_balance'] = _money(mortgage['outstanding_principal_balance'])
                 if 'last_payment_amount' in mortgage:
-                    subresponse['last_payment_amount'] = f"${mortgage['last_payment_amount']:,.2f}"
+                    subresponse['last_payment_amount'] = _money(mortgage['last_payment_amount'])
                 if 'last_payment_date' in mortgage:
                     subresponse['last_payment_date'] = mortgage['last_payment_date']
                 if 'loan_term' in mortgage:
                     subresponse['loan_term'] = mortgage['loan_term']
                 if 'interest_rate' in mortgage and 'percentage' in mortgage['interest_rate']:
                     rate = mortgage['interest_rate']['percentage']
-                    subresponse['interest_rate'] = f"{rate}%"
+                    subresponse['interest_rate'] = rate
                     if 'origination_principal_amount' in mortgage:
                         principal = mortgage['origination_principal_amount']
-                        subresponse['original_principal'] = f"${principal:,.2f}"
+                        subresponse['original_principal'] = _money(principal)
                         if rate and 'loan_term' in mortgage:
                             years = float(mortgage['loan_term'].split()[0])
                             monthly_rate = (rate/100) / 12
                             num_payments = years * 12
                             monthly_payment = principal * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
                             total = monthly_payment * num_payments
-                            subresponse['total_to_pay'] = f"${total:,.2f}"
-                            subresponse['monthly_payment'] = f"${monthly_payment:,.2f}"
+                            subresponse['total_to_pay'] = _money(total)
+                            subresponse['monthly_payment'] = _money(monthly_payment)
                 
                 mortgage_responses.append(subresponse)
         else:
@@ -452,46 +1055,133 @@ def get_liabilities(plaid_client: plaid_api.PlaidApi, access_token: str) -> Dict
             'error': 'NO_LIABILITY_ACCOUNTS',
             'message': 'Either your bank does not support liabilities, or you do not have any liability accounts.',
             'true_message': error_message,
-            'err': e
+            'err': str(e)
         }
 
+def _encode_transactions_cursor(position) -> Optional[str]:
+    if position is None:
+        return None
+    day, skip = position
+    return base64.urlsafe_b64encode(json.dumps([day, skip]).encode()).decode()
+
+def _decode_transactions_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        day, skip = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("Invalid transactions cursor") from e
+    if not isinstance(day, int) or not isinstance(skip, int) or day < 0 or skip < 0:
+        raise ValueError("Invalid transactions cursor")
+    return day, skip
+
+def validate_financial_profile_request(fields=None, transactions_limit=None, transactions_cursor=None) -> None:
+    """
+    Check get_user_financial_profile's field selection and paging arguments.
+    
+    Call it before get_user_financial_profile to report bad arguments as they are
+    (the Plaid data decorator prefixes every error it raises).
+    
+    Raises:
+        ValueError: If a field is unknown, the limit is out of range, or the cursor is
+            invalid or sent without a limit
+    """
+    unknown = [field for field in fields or () if field not in PROFILE_FIELD_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown profile fields: {', '.join(unknown)}")
+    if transactions_limit is not None and not 0 < transactions_limit <= MAX_TRANSACTIONS_PAGE_SIZE:
+        raise ValueError(f"transactions_limit must be between 1 and {MAX_TRANSACTIONS_PAGE_SIZE}")
+    if transactions_cursor and transactions_limit is None:
+        raise ValueError("transactions_cursor requires transactions_limit")
+    _decode_transactions_cursor(transactions_cursor)
+
 @get_plaid_data
-def get_user_financial_profile(transactions_days=30, **kwargs):
-    """Get a comprehensive financial profile for the user."""
+def get_user_financial_profile(
+    transactions_days=30,
+    fields=None,
+    transactions_limit=None,
+    transactions_cursor=None,
+    **kwargs
+):
+    """
+    Get a comprehensive financial profile for the user.
+    
+    The accounts, transactions, investments and liabilities sections are fetched
+    concurrently. A section that fails or exceeds PROFILE_SECTION_TIMEOUT is left
+    empty and its error is reported under 'errors' instead of failing the profile.
+    
+    Args:
+        transactions_days: Days of transaction history to include
+        fields: Profile fields to return (see PROFILE_FIELD_SECTIONS); None for all.
+            Plaid sections no requested field needs are never fetched.
+        transactions_limit: Page size for transactions (at most
+            MAX_TRANSACTIONS_PAGE_SIZE); None returns the whole window unpaged
+        transactions_cursor: 'transactions_next_cursor' from the previous page
+    """
+    validate_financial_profile_request(fields, transactions_limit, transactions_cursor)
+    if fields is None:
+        fields = list(PROFILE_FIELD_SECTIONS)
+    cursor_position = _decode_transactions_cursor(transactions_cursor)
+    
     try:
-        # Get account balances
-        accounts = get_account_balances(**kwargs)
-        
-        # Get transactions for the specified period
         start_date = datetime.now() - timedelta(days=transactions_days)
-        transactions = get_transactions(start_date=start_date, **kwargs)
         
-        # Get investment holdings
-        investments = get_investment_holdings(**kwargs)
-        
-        # Get liabilities
-        liabilities = get_liabilities(**kwargs)
+        # Sections run on pool threads without the request context, so they get the
+        # access token and client resolved here rather than reading the session.
+        sections = {
+            'accounts': (lambda: get_account_balances(**kwargs), []),
+            'transactions': (lambda: get_transaction_table(start_date=start_date, **kwargs), TransactionTable.from_records([])),
+            'investments': (lambda: get_investment_holdings(**kwargs), {}),
+            'liabilities': (lambda: get_liabilities(**kwargs), {})
+        }
+        needed = {section for field in fields for section in PROFILE_FIELD_SECTIONS[field]}
+        futures = {
+            name: _profile_executor.submit(fetch)
+            for name, (fetch, _) in sections.items()
+            if name in needed
+        }
         
-        # Calculate totals by account type
-        balances_by_type = defaultdict(float)
-        for account in accounts:
-            balances_by_type[str(account['type']).lower()] += account.get('balance', 0)
-            
-        # Calculate spending and income
-        total_spending = sum(t['amount'] for t in transactions if t['amount'] > 0)
-        total_income = abs(sum(t['amount'] for t in transactions if t['amount'] < 0))
+        results = {}
+        errors = {}
+        deadline = time.monotonic() + PROFILE_SECTION_TIMEOUT
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+            except Exception as e:
+                future.cancel()
+                results[name] = sections[name][1]
+                errors[name] = str(e) or f"Timed out after {PROFILE_SECTION_TIMEOUT}s"
         
-        return {
-            'accounts': accounts,
-            'balances': dict(balances_by_type),
-            'investments': investments.get('holdings', []),
-            'liabilities': liabilities,
-            'transactions': transactions,
-            'summary': {
+        profile = {}
+        if 'accounts' in fields:
+            profile['accounts'] = results['accounts']
+        if 'balances' in fields:
+            # Calculate totals by account type
+            balances_by_type = defaultdict(float)
+            for account in results['accounts']:
+                balances_by_type[str(account['type']).lower()] += account.get('balance', 0)
+            profile['balances'] = dict(balances_by_type)
+        if 'investments' in fields:
+            profile['investments'] = results['investments'].get('holdings', [])
+        if 'liabilities' in fields:
+            profile['liabilities'] = results['liabilities']
+        if 'transactions' in fields:
+            transactions = results['transactions']
+            if transactions_limit is None:
+                profile['transactions'] = transactions.to_records()
+            else:
+                page, next_position = transactions.newest_page(transactions_limit, cursor_position)
+                profile['transactions'] = page.to_records()
+                profile['transactions_next_cursor'] = _encode_transactions_cursor(next_position)
+        if 'summary' in fields:
+            # Calculate spending and income over the whole window, not just one page
+            total_spending, total_income = results['transactions'].cash_flow_totals()
+            profile['summary'] = {
                 'total_spending': total_spending,
                 'total_income': total_income
             }
-        }
+        profile['errors'] = errors
+        return profile
         
     except Exception as e:
-        raise Exception(f"Error generating user financial profile: {str(e)}") 
\ No newline at end of file
+        raise Exception(f"Error generating user financial profile: {str(e)}")
@@ -0,0 +1,284 @@
+"""
+Append-only, memory-mappable on-disk transaction store.
+Each Plaid item gets a directory of column files matching TransactionTable's columns,
+so synced history can be analyzed by background workers and API processes without a
+Plaid call and without loading the whole history onto the heap.
+
+Layout of an item directory:
+    meta.json           committed row/pool/tombstone counts and the sync cursor
+    days.i32, amounts.f64, name_codes.i32, merchant_codes.i32,
+    category_codes.i32, id_codes.i32
+                        one fixed-width value per row, appended in sync order
+    strings.enc         interned names, merchant names and transaction ids
+    categories.enc      interned category lists
+    tombstones.i64      row numbers superseded by a later modification or removal
+    lock                flock target serializing writers across processes
+
+Writers append data first and then atomically replace meta.json, so readers (who never
+lock) only ever see fully written rows. A crashed write is truncated away by the next
+writer.
+
+The string pools, which hold everything identifying (merchant and transaction names,
+transaction ids, categories), are Fernet-encrypted, one token per appended batch.
+The numeric columns (dates, amounts and pool codes) stay in plain form so they can be
+memory-mapped: anyone who can read the directory can see amounts and dates, though not
+what they were for. Keep the directory on an encrypted volume readable only by the API
+user. The store requires POSIX file locking (fcntl).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cryptography.fernet import Fernet
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from PlaidConnection.transaction_table import StringPool, TransactionTable
+
+# Column name -> (file name, dtype)
+_COLUMNS = {
+    'days': ('days.i32', np.int32),
+    'amounts': ('amounts.f64', np.float64),
+    'name_codes': ('name_codes.i32', np.int32),
+    'merchant_codes': ('merchant_codes.i32', np.int32),
+    'category_codes': ('category_codes.i32', np.int32),
+    'id_codes': ('id_codes.i32', np.int32),
+}
+
+# Bumped when the on-disk layout changes; an item stored in an older layout reads as
+# empty, so it is truncated by the next write and synced again from scratch
+_FORMAT_VERSION = 2
+
+_EMPTY_META = {
+    'format': _FORMAT_VERSION,
+    'rows': 0,
+    'tombstones': 0,
+    'strings_bytes': 0,
+    'categories_bytes': 0,
+    'cursor': None,
+}
+
+def item_key(access_token: str) -> str:
+    """Derive a filesystem-safe key for an item without writing its access token to disk."""
+    return hashlib.sha256(access_token.encode()).hexdigest()[:32]
+
+class TransactionFileStore:
+    """
+    On-disk transaction store rooted at a directory, with one sub-directory per item.
+
+    Args:
+        root_dir: Directory holding the item directories
+        fernet: Key the string pools are encrypted with; every process sharing the
+            directory must use the same key
+    """
+
+    def __init__(self, root_dir: str, fernet: Fernet):
+        if fcntl is None:
+            raise RuntimeError("TransactionFileStore needs POSIX file locking (fcntl); unset TRANSACTION_STORE_DIR on this platform")
+        self.root_dir = root_dir
+        self.fernet = fernet
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _path(self, key: str, name: str) -> str:
+        return os.path.join(self.root_dir, key, name)
+
+    def _read_meta(self, key: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(key, 'meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return dict(_EMPTY_META)
+        if meta.get('format') != _FORMAT_VERSION:
+            return dict(_EMPTY_META)
+        return {**_EMPTY_META, **meta}
+
+    def _write_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        tmp_path = self._path(key, f'meta.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(key, 'meta.json'))
+
+    @contextmanager
+    def _write_lock(self, key: str):
+        os.makedirs(os.path.join(self.root_dir, key), exist_ok=True)
+        with open(self._path(key, 'lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_pool(self, key: str, name: str, size: int) -> List[Any]:
+        if not size:
+            return []
+        with open(self._path(key, name), 'rb') as f:
+            data = f.read(size)
+        # One encrypted JSON list per appended batch
+        return [value for line in data.splitlines() for value in json.loads(self.fernet.decrypt(line))]
+
+    def _map_column(self, key: str, name: str, dtype, rows: int) -> np.ndarray:
+        if not rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(key, name), dtype=dtype, mode='r', shape=(rows,))
+
+    def _load(self, key: str, meta: Dict[str, Any]) -> Tuple[TransactionTable, np.ndarray, List[str]]:
+        """Map the committed columns; returns (table of live rows, their id codes, strings)."""
+        rows = meta['rows']
+        strings = StringPool()
+        for value in self._read_pool(key, 'strings.enc', meta['strings_bytes']):
+            strings.intern(value)
+        categories = StringPool()
+        for value in self._read_pool(key, 'categories.enc', meta['categories_bytes']):
+            categories.intern(tuple(value))
+        columns = {
+            name: self._map_column(key, file_name, dtype, rows)
+            for name, (file_name, dtype) in _COLUMNS.items()
+        }
+        id_codes = columns.pop('id_codes')
+        table = TransactionTable(strings=strings, categories=categories, **columns)
+
+        tombstones = self._map_column(key, 'tombstones.i64', np.int64, meta['tombstones'])
+        if len(tombstones):
+            live = np.ones(rows, dtype=bool)
+            live[tombstones] = False
+            table = table[live]
+            id_codes = id_codes[live]
+        return table, id_codes, strings.values
+
+    def read_table(self, key: str) -> TransactionTable:
+        """
+        Get an item's stored transactions as a TransactionTable.
+
+        Columns are memory-mapped, so nothing is read onto the heap until it is used
+        (if rows have been superseded, only the live rows are gathered into memory).
+        Rows are in sync order; use TransactionTable.between for date windows.
+        """
+        table, _, _ = self._load(key, self._read_meta(key))
+        return table
+
+    def read_sync_state(self, key: str) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+        """
+        Get an item's stored transactions (as dicts keyed by transaction_id) together
+        with the /transactions/sync cursor they were committed with.
+        """
+        meta = self._read_meta(key)
+        table, id_codes, strings = self._load(key, meta)
+        records = table.to_records(newest_first=False)
+        transactions = {strings[code]: record for code, record in zip(id_codes.tolist(), records)}
+        return transactions, meta['cursor']
+
+    def append(
+        self,
+        key: str,
+        added: List[tuple],
+        modified: List[tuple],
+        removed: List[str],
+        cursor: Optional[str]
+    ) -> None:
+        """
+        Append one batch of sync deltas and commit the new cursor.
+
+        Args:
+            added: (transaction_id, transaction) pairs of new transactions
+            modified: (transaction_id, transaction) pairs of changed transactions
+            removed: transaction_ids of deleted transactions
+            cursor: The sync cursor after this batch
+        """
+        with self._write_lock(key):
+            meta = self._read_meta(key)
+            # Drop anything a crashed writer left past the committed sizes
+            for file_name, dtype in _COLUMNS.values():
+                self._truncate(key, file_name, meta['rows'] * np.dtype(dtype).itemsize)
+            self._truncate(key, 'tombstones.i64', meta['tombstones'] * 8)
+            self._truncate(key, 'strings.enc', meta['strings_bytes'])
+            self._truncate(key, 'categories.enc', meta['categories_bytes'])
+
+            table, id_codes, strings = self._load(key, meta)
+            string_pool, category_pool = table.strings, table.categories
+            live_rows = {}
+            if meta['rows']:
+                # Row number of every live transaction, to tombstone superseded rows
+                all_rows = np.arange(meta['rows'])
+                tombstones = self._map_column(key, 'tombstones.i64', np.int64, meta['tombstones'])
+                if len(tombstones):
+                    live = np.ones(meta['rows'], dtype=bool)
+                    live[tombstones] = False
+                    all_rows = all_rows[live]
+                live_rows = {strings[code]: row for code, row in zip(id_codes.tolist(), all_rows.tolist())}
+
+            new_strings_start = len(string_pool)
+            new_categories_start = len(category_pool)
+            # Later deltas for the same transaction win, and removals win over upserts,
+            # matching how plaid_data_service applies a batch in memory
+            removed_ids = set(removed)
+            upserts = [
+                (t_id, trans) for t_id, trans in dict(list(added) + list(modified)).items()
+                if t_id not in removed_ids
+            ]
+            superseded = [live_rows[t_id] for t_id, _ in upserts if t_id in live_rows]
+            superseded += [live_rows[t_id] for t_id in removed if t_id in live_rows]
+
+            if upserts:
+                batch = TransactionTable.from_records((trans for _, trans in upserts), sort=False)
+                # Re-code the batch against the item's persistent pools
+                string_map = np.array([string_pool.intern(v) for v in batch.strings.values] or [0], dtype=np.int32)
+                category_map = np.array([category_pool.intern(v) for v in batch.categories.values] or [0], dtype=np.int32)
+                columns = {
+                    'days': batch.days,
+                    'amounts': batch.amounts,
+                    'name_codes': string_map[batch.name_codes],
+                    # -1 (no merchant) stays -1
+                    'merchant_codes': np.where(batch.merchant_codes >= 0, string_map[np.maximum(batch.merchant_codes, 0)], -1),
+                    'category_codes': category_map[batch.category_codes],
+                    'id_codes': np.array([string_pool.intern(t_id) for t_id, _ in upserts], dtype=np.int32),
+                }
+                for name, (file_name, dtype) in _COLUMNS.items():
+                    self._append_array(key, file_name, columns[name].astype(dtype))
+
+            if superseded:
+                self._append_array(key, 'tombstones.i64', np.array(superseded, dtype=np.int64))
+
+            meta['strings_bytes'] += self._append_lines(key, 'strings.enc', string_pool.values[new_strings_start:])
+            meta['categories_bytes'] += self._append_lines(key, 'categories.enc', [list(v) for v in category_pool.values[new_categories_start:]])
+            meta['rows'] += len(upserts)
+            meta['tombstones'] += len(superseded)
+            meta['cursor'] = cursor
+            self._write_meta(key, meta)
+
+    def delete(self, key: str) -> None:
+        """Delete everything stored for an item."""
+        with self._write_lock(key):
+            for name in os.listdir(os.path.join(self.root_dir, key)):
+                if name != 'lock':
+                    os.remove(self._path(key, name))
+        shutil.rmtree(os.path.join(self.root_dir, key), ignore_errors=True)
+
+    def _truncate(self, key: str, name: str, size: int) -> None:
+        path = self._path(key, name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+
+    def _append_array(self, key: str, name: str, values: np.ndarray) -> None:
+        with open(self._path(key, name), 'ab') as f:
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append_lines(self, key: str, name: str, values: List[Any]) -> int:
+        if not values:
+            return 0
+        data = self.fernet.encrypt(json.dumps(values).encode()) + b'\n'
+        with open(self._path(key, name), 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
@@ -0,0 +1,218 @@
+"""
+Compact columnar container for transactions.
+Transactions are held as typed NumPy columns instead of lists of dicts, so large
+histories can be sliced, filtered and aggregated without re-parsing or copying.
+Records are only rebuilt at the API boundary (see TransactionTable.to_records).
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+_EPOCH = date(1970, 1, 1)
+
+class StringPool:
+    """Interns values to small integer codes so columns can store codes instead of objects."""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def intern(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+class TransactionTable:
+    """
+    Transactions stored column-wise.
+
+    Columns:
+        days: date as int32 days since 1970-01-01
+        amounts: float64 amount (positive is money out, as in Plaid)
+        name_codes / merchant_codes: int32 codes into the shared string pool
+            (merchant_codes is -1 when the transaction has no merchant name)
+        category_codes: int32 codes into the category pool (tuples of category names)
+
+    Slicing with a slice returns a view that shares the columns and pools (no copy);
+    boolean masks and index arrays return a new table that still shares the pools.
+    """
+
+    def __init__(
+        self,
+        days: np.ndarray,
+        amounts: np.ndarray,
+        name_codes: np.ndarray,
+        merchant_codes: np.ndarray,
+        category_codes: np.ndarray,
+        strings: StringPool,
+        categories: StringPool,
+        is_sorted: bool = False
+    ):
+        self.days = days
+        self.amounts = amounts
+        self.name_codes = name_codes
+        self.merchant_codes = merchant_codes
+        self.category_codes = category_codes
+        self.strings = strings
+        self.categories = categories
+        # True when rows are in ascending date order, which allows date-range slicing
+        self.is_sorted = is_sorted
+
+    @classmethod
+    def from_records(cls, transactions: Iterable[Dict[str, Any]], sort: bool = True) -> 'TransactionTable':
+        """
+        Build a table from transaction dicts in a single pass.
+
+        Args:
+            transactions: Dicts with date, name, amount and optionally merchant_name and
+                category. Dates may be date objects or YYYY-MM-DD strings.
+            sort: Order rows by ascending date (stable). Pass False to keep input order.
+        """
+        strings = StringPool()
+        categories = StringPool()
+        day_strings, amounts, name_codes, merchant_codes, category_codes = [], [], [], [], []
+        for t in transactions:
+            day_strings.append(str(t['date']))
+            amounts.append(t['amount'])
+            name_codes.append(strings.intern(t['name']))
+            merchant = t.get('merchant_name')
+            merchant_codes.append(strings.intern(merchant) if merchant else -1)
+            category_codes.append(categories.intern(tuple(t.get('category') or ())))
+
+        table = cls(
+            days=np.array(day_strings, dtype='datetime64[D]').astype(np.int32),
+            amounts=np.array(amounts, dtype=np.float64),
+            name_codes=np.array(name_codes, dtype=np.int32),
+            merchant_codes=np.array(merchant_codes, dtype=np.int32),
+            category_codes=np.array(category_codes, dtype=np.int32),
+            strings=strings,
+            categories=categories
+        )
+        if sort:
+            table = table[np.argsort(table.days, kind='stable')]
+            table.is_sorted = True
+        return table
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, index) -> 'TransactionTable':
+        return TransactionTable(
+            days=self.days[index],
+            amounts=self.amounts[index],
+            name_codes=self.name_codes[index],
+            merchant_codes=self.merchant_codes[index],
+            category_codes=self.category_codes[index],
+            strings=self.strings,
+            categories=self.categories,
+            is_sorted=self.is_sorted and isinstance(index, slice) and index.step in (None, 1)
+        )
+
+    @staticmethod
+    def to_day(value: date) -> int:
+        """Convert a date to the day number used in the days column."""
+        return (value - _EPOCH).days
+
+    @staticmethod
+    def from_day(day: int) -> date:
+        """Convert a day number from the days column back to a date."""
+        return _EPOCH + timedelta(days=int(day))
+
+    def between(self, start_date: date, end_date: date) -> 'TransactionTable':
+        """Get the rows dated within [start_date, end_date], as a view when the table is sorted."""
+        start, end = self.to_day(start_date), self.to_day(end_date)
+        if self.is_sorted:
+            lo = np.searchsorted(self.days, start, side='left')
+            hi = np.searchsorted(self.days, end, side='right')
+            return self[lo:hi]
+        return self[(self.days >= start) & (self.days <= end)]
+
+    def newest_page(
+        self,
+        limit: int,
+        before: Optional[Tuple[int, int]] = None
+    ) -> Tuple['TransactionTable', Optional[Tuple[int, int]]]:
+        """
+        Get one page of rows, newest first, for cursor pagination of a sorted table.
+
+        Positions are (day, skip): continue with rows dated on or before day, leaving
+        out the skip newest rows of that day (already served). Unlike an offset, this
+        stays put when newer transactions arrive between pages.
+
+        Args:
+            limit: Maximum rows in the page
+            before: Position returned with the previous page, or None for the first page
+
+        Returns:
+            Tuple of (page as a view in ascending order, position of the next page or
+            None if this was the last). Use to_records(newest_first=True) on the page.
+        """
+        if not self.is_sorted:
+            raise ValueError("Pagination requires a date-sorted table")
+        end = len(self)
+        if before is not None:
+            day, skip = before
+            end = max(0, int(np.searchsorted(self.days, day, side='right')) - skip)
+        start = max(0, end - limit)
+        if start == 0:
+            return self[start:end], None
+        day = int(self.days[start])
+        # Rows of the page's oldest day that this page (and earlier ones) served
+        skip = int(np.searchsorted(self.days, day, side='right')) - start
+        return self[start:end], (day, skip)
+
+    @property
+    def key_codes(self) -> np.ndarray:
+        """Per-row code of the merchant name, falling back to the transaction name."""
+        return np.where(self.merchant_codes >= 0, self.merchant_codes, self.name_codes)
+
+    def primary_category(self, category_code: int) -> str:
+        """Get the first category name for a category code."""
+        categories = self.categories.values[category_code]
+        return categories[0] if categories else 'uncategorized'
+
+    def cash_flow_totals(self) -> Tuple[float, float]:
+        """Get (total_spending, total_income) for the table."""
+        total_spending = self.amounts[self.amounts > 0].sum()
+        total_income = abs(self.amounts[self.amounts < 0].sum())
+        return float(total_spending), float(total_income)
+
+    def totals_by_category(self) -> Dict[str, float]:
+        """Sum amounts by primary category."""
+        sums = np.bincount(self.category_codes, weights=self.amounts, minlength=len(self.categories))
+        totals: Dict[str, float] = {}
+        for code in np.unique(self.category_codes):
+            name = self.primary_category(code)
+            totals[name] = totals.get(name, 0.0) + float(sums[code])
+        return totals
+
+    def to_records(self, newest_first: bool = True) -> List[Dict[str, Any]]:
+        """
+        Rebuild transaction dicts, e.g. for JSON responses.
+
+        Args:
+            newest_first: Emit rows in reverse order, which is newest first for a
+                date-sorted table (the order /transactions/get uses)
+        """
+        strings = self.strings.values
+        categories = self.categories.values
+        order = range(len(self) - 1, -1, -1) if newest_first else range(len(self))
+        days = self.days.tolist()
+        amounts = self.amounts.tolist()
+        name_codes = self.name_codes.tolist()
+        merchant_codes = self.merchant_codes.tolist()
+        category_codes = self.category_codes.tolist()
+        return [{
+            'date': _EPOCH + timedelta(days=days[i]),
+            'name': strings[name_codes[i]],
+            'amount': amounts[i],
+            'category': list(categories[category_codes[i]]),
+            'merchant_name': strings[merchant_codes[i]] if merchant_codes[i] >= 0 else None
+        } for i in order]
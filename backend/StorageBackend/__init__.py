@@ -0,0 +1,4 @@
+"""
+StorageBackend package for choosing where the backend's documents are stored.
+This init file must be here for proper imports in other files.
+"""
@@ -0,0 +1,247 @@
+"""
+In-process stand-in for the parts of the Firestore client the backend uses, so code
+that reads and writes documents (and SnapshotCache's on_snapshot listeners) can be
+exercised without a Firestore project.
+
+Supported: collection/document references, get, set (with merge), update, delete,
+get_all, batches, last_update_time write preconditions, collection streams with
+order_by, SERVER_TIMESTAMP/DELETE_FIELD/Increment/ArrayUnion/ArrayRemove values and
+on_snapshot listeners. Listeners are called synchronously on the writing thread,
+with the initial snapshot delivered on subscribe. Transactions are not supported.
+
+An optional per-round-trip latency can be injected to approximate network cost.
+"""
+
+import copy
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class FakeWriteResult:
+    def __init__(self, update_time: datetime):
+        self.update_time = update_time
+
+
+class FakeWriteOption:
+    def __init__(self, last_update_time: datetime):
+        self.last_update_time = last_update_time
+
+
+class FakePreconditionFailed(Exception):
+    """Raised when a write's last_update_time option no longer matches the document."""
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference: 'FakeDocumentReference', data: Optional[Dict[str, Any]], update_time: Optional[datetime]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        """Get a field, raising KeyError if it is missing (as Firestore does)."""
+        if self._data is None:
+            return None
+        value = self._data
+        for part in field_path.split('.'):
+            value = value[part]
+        return copy.deepcopy(value)
+
+
+class FakeWatch:
+    def __init__(self, reference: 'FakeDocumentReference', callback: Callable):
+        self._reference = reference
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        self._reference._client._remove_listener(self._reference.path, self)
+
+
+class FakeDocumentReference:
+    def __init__(self, client: 'FakeFirestoreClient', path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name: str) -> 'FakeCollectionReference':
+        return FakeCollectionReference(self._client, f'{self.path}/{name}')
+
+    def get(self, transaction=None, timeout=None) -> FakeDocumentSnapshot:
+        self._client._round_trip()
+        return self._client._snapshot(self.path)
+
+    def set(self, data: Dict[str, Any], merge: bool = False) -> FakeWriteResult:
+        return self._client._write_many([(self.path, data, merge, None)])[0]
+
+    def update(self, data: Dict[str, Any], option: Optional[FakeWriteOption] = None) -> FakeWriteResult:
+        return self._client._write_many([(self.path, data, True, option or _MUST_EXIST)])[0]
+
+    def delete(self, option: Optional[FakeWriteOption] = None) -> FakeWriteResult:
+        return self._client._write_many([(self.path, None, False, option)])[0]
+
+    def on_snapshot(self, callback: Callable) -> FakeWatch:
+        watch = FakeWatch(self, callback)
+        self._client._add_listener(self.path, watch)
+        return watch
+
+
+class FakeQuery:
+    def __init__(self, collection: 'FakeCollectionReference', order_by: Optional[str] = None):
+        self._collection = collection
+        self._order_by = order_by
+
+    def order_by(self, field_path: str) -> 'FakeQuery':
+        return FakeQuery(self._collection, field_path)
+
+    def stream(self) -> Iterable[FakeDocumentSnapshot]:
+        self._collection._client._round_trip()
+        snapshots = self._collection._client._children(self._collection.path)
+        if self._order_by is not None:
+            snapshots.sort(key=lambda snapshot: snapshot.get(self._order_by))
+        return iter(snapshots)
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: 'FakeFirestoreClient', path: str):
+        self._client = client
+        self.path = path
+        super().__init__(self)
+
+    def document(self, document_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, f'{self.path}/{document_id}')
+
+
+class FakeWriteBatch:
+    def __init__(self, client: 'FakeFirestoreClient'):
+        self._client = client
+        self._writes: List[tuple] = []
+
+    def set(self, reference: FakeDocumentReference, data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append((reference.path, data, merge, None))
+
+    def update(self, reference: FakeDocumentReference, data: Dict[str, Any], option: Optional[FakeWriteOption] = None) -> None:
+        self._writes.append((reference.path, data, True, option or _MUST_EXIST))
+
+    def delete(self, reference: FakeDocumentReference, option: Optional[FakeWriteOption] = None) -> None:
+        self._writes.append((reference.path, None, False, option))
+
+    def commit(self) -> List[FakeWriteResult]:
+        return self._client._write_many(self._writes)
+
+
+class FakeFirestoreClient:
+    """
+    A thread-safe in-memory Firestore client (see the module docstring).
+
+    Args:
+        latency: Seconds to sleep on every read or write round trip
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._update_times: Dict[str, datetime] = {}
+        self._listeners: Dict[str, List[FakeWatch]] = {}
+        self._last_update_time = datetime.now(timezone.utc)
+        self._lock = threading.RLock()
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def write_option(self, last_update_time: datetime) -> FakeWriteOption:
+        return FakeWriteOption(last_update_time)
+
+    def get_all(self, references: Iterable[FakeDocumentReference]) -> Iterable[FakeDocumentSnapshot]:
+        self._round_trip()
+        return iter([self._snapshot(reference.path) for reference in references])
+
+    def _round_trip(self) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _snapshot(self, path: str) -> FakeDocumentSnapshot:
+        with self._lock:
+            return FakeDocumentSnapshot(
+                FakeDocumentReference(self, path),
+                copy.deepcopy(self._documents.get(path)),
+                self._update_times.get(path)
+            )
+
+    def _children(self, collection_path: str) -> List[FakeDocumentSnapshot]:
+        prefix = collection_path + '/'
+        with self._lock:
+            # Firestore returns a collection's documents ordered by ID
+            paths = sorted(p for p in self._documents if p.startswith(prefix) and '/' not in p[len(prefix):])
+            return [self._snapshot(path) for path in paths]
+
+    def _write_many(self, writes: List[tuple]) -> List[FakeWriteResult]:
+        self._round_trip()
+        with self._lock:
+            # Firestore update times strictly increase; keep that even if the clock doesn't
+            update_time = max(datetime.now(timezone.utc), self._last_update_time + timedelta(microseconds=1))
+            # Check every precondition first so a failed batch writes nothing
+            for path, _, _, option in writes:
+                if option is _MUST_EXIST and path not in self._documents:
+                    raise FakePreconditionFailed(f"No document to update: {path}")
+                if isinstance(option, FakeWriteOption) and self._update_times.get(path) != option.last_update_time:
+                    raise FakePreconditionFailed(f"Document changed since last_update_time: {path}")
+            self._last_update_time = update_time
+            for path, data, merge, _ in writes:
+                if data is None:
+                    self._documents.pop(path, None)
+                    self._update_times.pop(path, None)
+                    continue
+                document = dict(self._documents.get(path, {})) if merge else {}
+                for key, value in data.items():
+                    if type(value).__name__ == 'Sentinel' and 'delete' in value.description:
+                        document.pop(key, None)
+                    else:
+                        document[key] = _apply_value(document.get(key), value, update_time)
+                self._documents[path] = document
+                self._update_times[path] = update_time
+            notify = [(path, list(self._listeners.get(path, ()))) for path, _, _, _ in writes]
+            for path, watches in notify:
+                for watch in watches:
+                    watch._callback([self._snapshot(path)], [], update_time)
+            return [FakeWriteResult(update_time) for _ in writes]
+
+    def _add_listener(self, path: str, watch: FakeWatch) -> None:
+        with self._lock:
+            self._listeners.setdefault(path, []).append(watch)
+            watch._callback([self._snapshot(path)], [], self._last_update_time)
+
+    def _remove_listener(self, path: str, watch: FakeWatch) -> None:
+        with self._lock:
+            watches = self._listeners.get(path, [])
+            if watch in watches:
+                watches.remove(watch)
+
+
+# Write option marking an update, which fails if the document doesn't exist
+_MUST_EXIST = object()
+
+
+def _apply_value(current: Any, value: Any, update_time: datetime) -> Any:
+    """Resolve sentinels and transforms against a field's current value."""
+    kind = type(value).__name__
+    if kind == 'Sentinel':
+        # SERVER_TIMESTAMP (DELETE_FIELD is handled by the caller)
+        return update_time
+    if kind == 'Increment':
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if kind in ('ArrayUnion', 'ArrayRemove'):
+        existing = list(current) if isinstance(current, list) else []
+        values = list(value.values)
+        if kind == 'ArrayUnion':
+            return existing + [v for i, v in enumerate(values) if v not in existing and v not in values[:i]]
+        return [v for v in existing if v not in values]
+    return copy.deepcopy(value)
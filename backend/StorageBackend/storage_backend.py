@@ -0,0 +1,106 @@
+"""
+Storage backends for UserDataCollection, APIKeyManager and PlaidCredentialsManager.
+Each backend hands out a client with the Firestore client interface:
+
+    firestore   the Firebase project (default)
+    memory      an in-process store (StorageBackend.fake_firestore) with optional injected
+                latency, for load-testing and benchmarking the API with no network;
+                API keys come from the environment (see APIKeyManager)
+
+Select with the STORAGE_BACKEND environment variable (and STORAGE_LATENCY_MS for the
+memory backend), or call set_storage_backend before the managers are first created.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from StorageBackend.fake_firestore import FakeFirestoreClient
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore')
+STORAGE_LATENCY_MS = float(os.getenv('STORAGE_LATENCY_MS', '0'))
+
+class StorageBackend(ABC):
+    """Interface every storage backend implements."""
+
+    # True when the backend never leaves the process, so cloud-only services
+    # (such as Secret Manager) should not be contacted either
+    is_local = False
+
+    @abstractmethod
+    def client(self):
+        """Get a client implementing the Firestore client interface."""
+
+    def reset(self) -> None:
+        """Drop connections inherited from a parent process (call in a forked worker)."""
+
+class FirestoreBackend(StorageBackend):
+    """Documents stored in the Firebase project's Firestore database."""
+
+    def __init__(self, credentials_path: Optional[str] = None):
+        self.credentials_path = credentials_path
+        self._client = None
+
+    def client(self):
+        if self._client is None:
+            # Initialize Firebase if not already initialized
+            if not firebase_admin._apps:
+                credentials_path = self.credentials_path
+                if credentials_path is None:
+                    from EncryptionKeyStorage.API_key_manager import APIKeyManager
+                    credentials_path = APIKeyManager.get_firebase_path()
+                firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+            self._client = firestore.client()
+        return self._client
+
+    def reset(self) -> None:
+        # gRPC channels don't survive fork; firebase_admin caches its client per app,
+        # so build a fresh one the same way it does
+        if self._client is not None:
+            from google.cloud import firestore as cloud_firestore
+            app = firebase_admin.get_app()
+            self._client = cloud_firestore.Client(credentials=app.credential.get_credential(), project=app.project_id)
+
+class MemoryBackend(StorageBackend):
+    """
+    Documents stored in process memory; nothing is persisted.
+
+    Args:
+        latency_ms: Delay added to every simulated round trip, to approximate the
+            network cost of Firestore when benchmarking
+    """
+
+    is_local = True
+
+    def __init__(self, latency_ms: float = 0):
+        self._client = FakeFirestoreClient(latency=latency_ms / 1000)
+
+    def client(self):
+        return self._client
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+def get_storage_backend() -> StorageBackend:
+    """Get the process-wide storage backend, creating it from the environment on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if STORAGE_BACKEND == 'memory':
+                    _backend = MemoryBackend(latency_ms=STORAGE_LATENCY_MS)
+                elif STORAGE_BACKEND == 'firestore':
+                    _backend = FirestoreBackend()
+                else:
+                    raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'. Use 'firestore' or 'memory'")
+    return _backend
+
+def set_storage_backend(backend: StorageBackend) -> None:
+    """Replace the process-wide storage backend; managers created afterwards use it."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
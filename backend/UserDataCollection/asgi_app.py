@@ -0,0 +1,169 @@
+"""
+ASGI entry point for the API.
+/api/stream_gpt_response is served natively on the event loop, so an open chat
+stream waiting on the model costs a coroutine instead of a worker thread. Every
+other route (and CORS preflights) goes to the Flask app through asgiref's WSGI
+adapter.
+
+Run with an ASGI server from this directory, e.g.
+    uvicorn asgi_app:app --port 5002
+"""
+
+import asyncio
+import json
+import os
+import sys
+from http.cookies import SimpleCookie
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asgiref.wsgi import WsgiToAsgi
+
+from user_data_api import app as flask_app, chat_service, id_token_verifier, CORS_ORIGINS
+from ChatBot.conversation_store import get_conversation_store
+
+STREAM_PATH = '/api/stream_gpt_response'
+
+_wsgi_app = WsgiToAsgi(flask_app)
+_session_serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+
+async def app(scope, receive, send):
+    """The ASGI application."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == STREAM_PATH and scope['method'] == 'POST':
+        await _stream_gpt_response(scope, receive, send)
+    else:
+        await _wsgi_app(scope, receive, send)
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def _stream_gpt_response(scope, receive, send):
+    """Async equivalent of the Flask stream_gpt_response route."""
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    cors_headers = _cors_headers(headers.get('origin'))
+
+    # Same checks as require_auth
+    auth_header = headers.get('authorization', '')
+    if not auth_header.startswith('Bearer '):
+        await _send_json(send, 401, {'error': 'No authentication token provided'}, cors_headers)
+        return
+    try:
+        user_id = id_token_verifier.verify(auth_header.split('Bearer ')[1])['uid']
+    except Exception:
+        await _send_json(send, 401, {'error': 'Invalid authentication token'}, cors_headers)
+        return
+
+    try:
+        data = json.loads(await _read_body(receive) or b'{}')
+        prompt = data.get('prompt', '')
+        if not prompt:
+            await _send_json(send, 400, {'error': 'Prompt is required'}, cors_headers)
+            return
+
+        session = _load_session(headers.get('cookie'))
+        session['firebase_user_id'] = user_id
+
+        # Store and Firestore calls are blocking, so run them off the event loop
+        conversation_store = get_conversation_store()
+        conversation_id = session.get('conversation_id')
+        messages = None
+        if conversation_id:
+            messages = await asyncio.to_thread(conversation_store.load, conversation_id, user_id)
+        if messages is None:
+            messages = await asyncio.to_thread(chat_service.initialize_chat, user_id)
+            conversation_id = await asyncio.to_thread(conversation_store.create, user_id, messages)
+            session['conversation_id'] = conversation_id
+        history_length = len(messages)
+        # Wait for the first piece before starting the response, so OpenAI errors
+        # can still be reported with a 500
+        stream = chat_service.get_response_stream_async(messages, prompt)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = None
+    except Exception as e:
+        await _send_json(send, 500, {'error': 'Failed to process GPT request', 'details': str(e)}, cors_headers)
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            (b'set-cookie', _session_cookie(session).encode('latin-1')),
+        ] + cors_headers,
+    })
+    try:
+        if first is not None:
+            await send({'type': 'http.response.body', 'body': f"data: {first}\n\n".encode(), 'more_body': True})
+        async for content in stream:
+            await send({'type': 'http.response.body', 'body': f"data: {content}\n\n".encode(), 'more_body': True})
+    finally:
+        await stream.aclose()
+        # Persist this turn's prompt and reply as one appended chunk
+        await asyncio.to_thread(conversation_store.append, conversation_id, user_id, messages[history_length:])
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return body
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+def _load_session(cookie_header):
+    """Read Flask's signed session cookie, so both paths share one session."""
+    cookie = SimpleCookie()
+    cookie.load(cookie_header or '')
+    morsel = cookie.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if morsel is None:
+        return {}
+    try:
+        return dict(_session_serializer.loads(morsel.value, max_age=int(flask_app.permanent_session_lifetime.total_seconds())))
+    except Exception:
+        return {}
+
+def _session_cookie(session) -> str:
+    """Build a Set-Cookie value matching the Flask app's session cookie settings."""
+    config = flask_app.config
+    parts = [f"{config['SESSION_COOKIE_NAME']}={_session_serializer.dumps(session)}", 'Path=/']
+    if config['SESSION_COOKIE_HTTPONLY']:
+        parts.append('HttpOnly')
+    if config['SESSION_COOKIE_SECURE']:
+        parts.append('Secure')
+    if config['SESSION_COOKIE_SAMESITE']:
+        parts.append(f"SameSite={config['SESSION_COOKIE_SAMESITE']}")
+    return '; '.join(parts)
+
+def _cors_headers(origin):
+    """CORS headers matching the Flask app's configuration, for an allowed origin."""
+    if origin not in CORS_ORIGINS:
+        return []
+    return [
+        (b'access-control-allow-origin', origin.encode('latin-1')),
+        (b'access-control-allow-credentials', b'true'),
+        (b'access-control-expose-headers', b'Content-Type'),
+        (b'vary', b'Origin'),
+    ]
+
+async def _send_json(send, status, payload, extra_headers):
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())] + extra_headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,79 @@
+"""
+ETags and conditional GETs for the Flask API.
+Successful JSON GET responses carry a weak ETag and are answered with an empty 304
+when the client's If-None-Match matches. By default the ETag is a hash of the
+uncompressed body; routes whose data has a cheap version token (see etag_from_version)
+derive it from the version instead, and skip building the response entirely on a match.
+"""
+
+import hashlib
+from functools import wraps
+from typing import Callable
+
+from flask import Flask, current_app, request, session
+
+# Browsers may keep responses but must revalidate them; shared caches must not keep them
+CACHE_CONTROL = 'private, no-cache'
+
+def _make_etag(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def _not_modified(etag: str):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+def etag_from_version(get_version: Callable[[], str]):
+    """
+    Decorator answering If-None-Match from a version token rather than the response body.
+    Place it below require_auth. The ETag covers the user, the URL and the version,
+    and when the client's copy is current the view isn't called at all.
+
+    Args:
+        get_version: Returns a string that changes whenever the view's response can change
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                etag = _make_etag(session.get('firebase_user_id'), request.full_path, get_version())
+            except Exception:
+                # Let the view report the error
+                return f(*args, **kwargs)
+            if request.if_none_match.contains_weak(etag):
+                return _not_modified(etag)
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return decorated_function
+    return decorator
+
+def conditional_response(response):
+    """after_request hook adding ETags to JSON GET responses and answering If-None-Match."""
+    if (
+        request.method not in ('GET', 'HEAD')
+        or response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.mimetype != 'application/json'
+    ):
+        return response
+
+    response.headers.setdefault('Cache-Control', CACHE_CONTROL)
+    if 'ETag' not in response.headers:
+        response.set_etag(_make_etag(response.get_data()), weak=True)
+    return response.make_conditional(request)
+
+def init_conditional_requests(app: Flask) -> None:
+    """
+    Install ETag handling. Call after init_response_encoding: after_request hooks run
+    in reverse order of registration, so ETags are computed on the uncompressed body
+    and 304s are never compressed.
+    """
+    app.after_request(conditional_response)
@@ -0,0 +1,76 @@
+"""
+Production server configuration for the API.
+Run from this directory:
+
+    gunicorn -c gunicorn.conf.py
+
+API_SERVER_MODE picks the app:
+    wsgi    user_data_api:app on threaded workers (default)
+    asgi    asgi_app:app on uvicorn workers, so chat streams don't hold threads
+
+The app is preloaded in the master process, so Firebase init, the Secret Manager
+fetch and ChatService construction run once and the initialized singletons are
+shared copy-on-write with every worker. Each worker reopens its Firestore connection
+after the fork (gRPC channels can't be shared across processes).
+
+Graceful reload: HUP restarts workers from the already-loaded code, finishing
+in-flight requests first. To deploy new code with preloading, send USR2 (starts a
+new master on the new code) and then QUIT to the old master once it's ready.
+
+Tuning (environment variables):
+    API_BIND              address to listen on (default 0.0.0.0:5002)
+    API_WORKERS           worker processes (default 2 x CPUs + 1)
+    API_THREADS           threads per WSGI worker (default 4)
+    API_TIMEOUT           seconds before a silent worker is restarted (default 120)
+    API_GRACEFUL_TIMEOUT  seconds to finish requests on shutdown/reload (default 30)
+    API_MAX_REQUESTS      recycle a worker after this many requests, 0 = never (default 0)
+"""
+
+import multiprocessing
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+API_SERVER_MODE = os.getenv('API_SERVER_MODE', 'wsgi')
+
+bind = os.getenv('API_BIND', '0.0.0.0:5002')
+workers = int(os.getenv('API_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.getenv('API_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('API_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+max_requests = int(os.getenv('API_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+if API_SERVER_MODE == 'asgi':
+    wsgi_app = 'asgi_app:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif API_SERVER_MODE == 'wsgi':
+    wsgi_app = 'user_data_api:app'
+    worker_class = 'gthread'
+    threads = int(os.getenv('API_THREADS', 4))
+else:
+    raise ValueError(f"Unknown API_SERVER_MODE '{API_SERVER_MODE}'. Use 'wsgi' or 'asgi'")
+
+def post_fork(server, worker):
+    """Give the worker its own storage connection in place of the master's."""
+    from StorageBackend.storage_backend import get_storage_backend
+    from ChatBot.conversation_store import FirestoreConversationStore, get_conversation_store
+
+    backend = get_storage_backend()
+    backend.reset()
+    managers = [
+        ('EncryptionKeyStorage.API_key_manager', 'APIKeyManager'),
+        ('PlaidConnection.plaid_credentials_manager', 'PlaidCredentialsManager'),
+        ('UserDataCollection.user_data_collection', 'UserDataCollection'),
+    ]
+    for module_name, class_name in managers:
+        module = sys.modules.get(module_name)
+        instance = getattr(getattr(module, class_name, None), '_instance', None)
+        if instance is not None and instance._initialized:
+            instance.db = backend.client()
+    conversation_store = get_conversation_store()
+    if isinstance(conversation_store, FirestoreConversationStore):
+        conversation_store.db = backend.client()
+    server.log.info(f"Worker {worker.pid} reset storage connections")
@@ -0,0 +1,129 @@
+"""
+Offline verification of Firebase ID tokens.
+Google's signing certificates are fetched once and kept until their Cache-Control
+max-age runs out, and tokens that already verified are remembered (by hash) until
+they expire, so authenticating a request is normally a dictionary lookup.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from google.auth import jwt
+
+from Caching.ttl_cache import TTLCache
+
+FIREBASE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+
+# Certificates are refetched after this long if the response had no max-age
+DEFAULT_CERTS_MAX_AGE = 3600  # seconds
+# Minimum gap between refetches triggered by an unknown key ID
+UNKNOWN_KEY_REFRESH_INTERVAL = 60  # seconds
+
+VERIFIED_TOKEN_CACHE_SIZE = 4096
+VERIFIED_TOKEN_CACHE_TTL = 300  # seconds, and never past the token's exp
+CLOCK_SKEW = 10  # seconds
+
+class IdTokenVerifier:
+    """
+    Verifies Firebase ID tokens for one Firebase project without a network call
+    per token.
+
+    Performs the same checks as firebase_admin.auth.verify_id_token: RS256
+    signature against Google's current certificates, aud (project ID), iss, exp,
+    iat, auth_time and a non-empty sub. Revocation is not checked.
+    """
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.issuer = f'https://securetoken.google.com/{project_id}'
+        self._certs: Dict[str, str] = {}
+        self._certs_expire_at = 0.0
+        self._certs_fetched_at = 0.0
+        self._certs_lock = threading.Lock()
+        self._verified = TTLCache(maxsize=VERIFIED_TOKEN_CACHE_SIZE, ttl=VERIFIED_TOKEN_CACHE_TTL)
+
+    def verify(self, id_token: str) -> Dict[str, Any]:
+        """
+        Verify an ID token and return its claims.
+
+        Args:
+            id_token: The encoded Firebase ID token
+
+        Returns:
+            Dict[str, Any]: The token's claims, with the user's ID under 'uid'
+
+        Raises:
+            ValueError: If the token is malformed, expired, or fails any check
+        """
+        token_hash = hashlib.sha256(id_token.encode()).hexdigest()
+        claims = self._verified.get(token_hash)
+        if claims is not None:
+            return claims
+
+        claims = self._verify_uncached(id_token)
+        remaining = claims['exp'] - time.time()
+        if remaining > 0:
+            self._verified.set(token_hash, claims, ttl=min(VERIFIED_TOKEN_CACHE_TTL, remaining))
+        return claims
+
+    def _verify_uncached(self, id_token: str) -> Dict[str, Any]:
+        header = jwt.decode_header(id_token)
+        if header.get('alg') != 'RS256':
+            raise ValueError("ID token must be signed with RS256")
+        kid = header.get('kid')
+        if not kid:
+            raise ValueError("ID token has no key ID")
+
+        cert = self._get_cert(kid)
+        claims = jwt.decode(id_token, certs=cert, audience=self.project_id, clock_skew_in_seconds=CLOCK_SKEW)
+
+        if claims.get('iss') != self.issuer:
+            raise ValueError("ID token has an incorrect issuer")
+        sub = claims.get('sub')
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise ValueError("ID token has an invalid subject")
+        if claims.get('auth_time', 0) > time.time() + CLOCK_SKEW:
+            raise ValueError("ID token auth_time is in the future")
+
+        claims['uid'] = sub
+        return claims
+
+    def _get_cert(self, kid: str) -> str:
+        """Get the certificate for a key ID, refetching when expired or unknown."""
+        now = time.monotonic()
+        cert = self._certs.get(kid) if now < self._certs_expire_at else None
+        if cert is not None:
+            return cert
+
+        with self._certs_lock:
+            now = time.monotonic()
+            expired = now >= self._certs_expire_at
+            # A key we haven't seen may mean Google rotated keys early
+            rotated = kid not in self._certs and now - self._certs_fetched_at >= UNKNOWN_KEY_REFRESH_INTERVAL
+            if expired or rotated:
+                self._refresh_certs()
+            cert = self._certs.get(kid)
+        if cert is None:
+            raise ValueError("ID token was signed with an unknown key")
+        return cert
+
+    def _refresh_certs(self) -> None:
+        """Fetch Google's certificates (caller holds the lock)."""
+        response = requests.get(FIREBASE_CERTS_URL, timeout=10)
+        response.raise_for_status()
+        self._certs = response.json()
+        self._certs_fetched_at = time.monotonic()
+        self._certs_expire_at = self._certs_fetched_at + self._max_age(response.headers.get('Cache-Control'))
+
+    @staticmethod
+    def _max_age(cache_control: Optional[str]) -> int:
+        match = re.search(r'max-age=(\d+)', cache_control or '')
+        return int(match.group(1)) if match else DEFAULT_CERTS_MAX_AGE
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss statistics for the verified token cache."""
+        return self._verified.stats()
@@ -0,0 +1,103 @@
+"""
+Faster JSON encoding and compressed responses for the Flask API.
+jsonify goes through orjson, which serializes NumPy values, dates and datetimes
+natively (as numbers and ISO 8601 strings), and large responses are gzip or brotli
+compressed according to the client's Accept-Encoding.
+"""
+
+import gzip
+from decimal import Decimal
+from typing import Any
+
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Falls back to Flask's encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Responses smaller than this aren't worth the compression CPU
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/css', 'application/javascript')
+
+def _default(value: Any) -> Any:
+    """Encode types orjson doesn't handle itself."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, 'to_dict'):
+        # Plaid model objects
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (NumPy, date and datetime aware)."""
+
+    options = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=self.options).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        # Same arguments as jsonify: one value, several values (a list) or keyword arguments
+        if args and kwargs:
+            raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+        obj = args[0] if len(args) == 1 else (args or kwargs or None)
+        body = orjson.dumps(obj, default=_default, option=self.options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def _choose_encoding() -> str:
+    """Pick the best encoding the client accepts, or '' for none."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return ''
+
+def compress_response(response):
+    """after_request hook compressing large, compressible responses."""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = _choose_encoding()
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_response_encoding(app: Flask) -> None:
+    """Install the orjson provider (when orjson is available) and response compression."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    app.after_request(compress_response)
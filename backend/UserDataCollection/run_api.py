@@ -5,6 +5,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from user_data_api import app
 
 if __name__ == "__main__":
+    # Development server only; for production run gunicorn -c gunicorn.conf.py
     try:
         app.run(host='0.0.0.0', port=5002, debug=True)
     except Exception as e:
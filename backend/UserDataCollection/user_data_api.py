@@ -1,8 +1,7 @@
 from flask import Flask, request, jsonify, session, Response
 from flask_cors import CORS
-from firebase_admin import auth
 from functools import wraps
-from user_data_collection import UserDataCollection
+from UserDataCollection.user_data_collection import UserDataCollection
 import os
 import plaid
 from plaid.api import plaid_api
@@ -10,29 +9,41 @@ from plaid.configuration import Configuration
 from plaid.api_client import ApiClient
 from plaid.model.link_token_create_request import LinkTokenCreateRequest
 from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
+from plaid.model.link_token_transactions import LinkTokenTransactions
 from plaid.model.products import Products
 from plaid.model.country_code import CountryCode
 from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
 from PlaidConnection.plaid_credentials_manager import PlaidCredentialsManager
-from PlaidConnection.plaid_data_service import get_user_financial_profile
+from PlaidConnection.plaid_data_service import get_user_financial_profile, validate_financial_profile_request, TRANSACTIONS_SYNC_DAYS_REQUESTED
 import openai
 from EncryptionKeyStorage.API_key_manager import APIKeyManager
+from UserDataCollection.id_token_verifier import IdTokenVerifier
+from UserDataCollection.response_encoding import init_response_encoding
+from UserDataCollection.conditional_requests import init_conditional_requests, etag_from_version
 
 # Import ChatService
 from ChatBot.chat_service import ChatService
+from ChatBot.conversation_store import get_conversation_store
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Set FLASK_SECRET_KEY when running several workers so they accept each other's sessions
+app.secret_key = os.getenv('FLASK_SECRET_KEY') or os.urandom(24)
 
 # Configure CORS
+CORS_ORIGINS = ['http://localhost:5173']
 CORS(app, 
-     origins=['http://localhost:5173'],
+     origins=CORS_ORIGINS,
      supports_credentials=True,
      allow_headers=['Content-Type', 'Authorization'],
      methods=['GET', 'POST', 'OPTIONS'],
-     expose_headers=['Content-Type'],
+     expose_headers=['Content-Type', 'ETag'],
      max_age=600)
 
+# orjson-backed jsonify and gzip/brotli compression of large responses
+init_response_encoding(app)
+# ETags and 304s for unchanged GET responses (registered after compression so it runs first)
+init_conditional_requests(app)
+
 # Configure session and security headers
 app.config.update(
     SESSION_COOKIE_SECURE=True,
@@ -45,15 +56,36 @@ PLAID_ENV = 'https://sandbox.plaid.com'
 PLAID_REDIRECT_URI = 'https://localhost:5173'
 FIREBASE_PROJECT_ID = 'fynnance-5031a'
 
+# Seconds the readiness check waits for storage
+READINESS_TIMEOUT = 2
+
 # Initialize Plaid credentials manager
 credentials_manager = PlaidCredentialsManager()
 
 # Initialize OpenAI with our API key
-openai.api_key = APIKeyManager.get_api_key('openai')
+openai.api_key = APIKeyManager().get_api_key('openai')
 
 # Initialize ChatService
 chat_service = ChatService()
 
+# Verifies Firebase ID tokens against cached Google certificates
+id_token_verifier = IdTokenVerifier(FIREBASE_PROJECT_ID)
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness check: the worker is up and serving requests."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness check: shared services are initialized and storage answers."""
+    try:
+        # One cheap document read, bounded so a slow backend reads as not ready
+        credentials_manager.db.collection('health').document('readyz').get(timeout=READINESS_TIMEOUT)
+        return jsonify({'status': 'ready', 'pid': os.getpid()})
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+
 def require_auth(f):
     """Decorator to require Firebase authentication."""
     @wraps(f)
@@ -64,8 +96,8 @@ def require_auth(f):
 
         id_token = auth_header.split('Bearer ')[1]
         try:
-            # Verify the Firebase ID token
-            decoded_token = auth.verify_id_token(id_token)
+            # Verify the Firebase ID token (cached, no network call per request)
+            decoded_token = id_token_verifier.verify(id_token)
             # Store user ID in session
             session['firebase_user_id'] = decoded_token['uid']
             return f(*args, **kwargs)
@@ -74,9 +106,72 @@ def require_auth(f):
 
     return decorated_function
 
+def _user_doc_version() -> str:
+    return UserDataCollection().get_user_doc_version()
+
+def _profile_version() -> str:
+    return UserDataCollection().get_profile_version()
+
+@app.route('/api/user/profile', methods=['GET'])
+@require_auth
+@etag_from_version(_profile_version)
+def get_profile():
+    """Get all of the user's profile fields in one response (user document plus goals and preferences)."""
+    try:
+        user_data = UserDataCollection()
+        profile = user_data.get_profile()
+        dob = profile['date_of_birth']
+        profile['date_of_birth'] = dob.isoformat() if dob else None
+        return jsonify(profile)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/profile', methods=['POST'])
+@require_auth
+def update_profile():
+    """Update any number of profile fields with one batched write."""
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or not data:
+            return jsonify({'error': 'At least one profile field is required'}), 400
+        
+        # Coerce JSON values the same way the single-field routes do
+        converters = {
+            'income': float,
+            'assets': float,
+            'credit_score': int,
+            'zip_code': str,
+            'first_name': str,
+            'last_name': str,
+            'email': str,
+            'goals': str,
+            'preferences': str,
+        }
+        fields = {}
+        for name, value in data.items():
+            if name == 'date_of_birth':
+                from datetime import datetime
+                try:
+                    fields[name] = datetime.strptime(value, '%Y-%m-%d').date()
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+            elif name in converters:
+                fields[name] = converters[name](value)
+            else:
+                return jsonify({'error': f'Unknown profile field: {name}'}), 400
+        
+        user_data = UserDataCollection()
+        user_data.update_profile(fields)
+        return jsonify({'message': 'Profile updated successfully', 'updated': sorted(fields)})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Required field getters
 @app.route('/api/user/first_name', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_first_name():
     try:
         user_data = UserDataCollection()
@@ -86,6 +181,7 @@ def get_first_name():
 
 @app.route('/api/user/last_name', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_last_name():
     try:
         user_data = UserDataCollection()
@@ -95,6 +191,7 @@ def get_last_name():
 
 @app.route('/api/user/email', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_email():
     try:
         user_data = UserDataCollection()
@@ -104,6 +201,7 @@ def get_email():
 
 @app.route('/api/user/date_of_birth', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_date_of_birth():
     try:
         user_data = UserDataCollection()
@@ -115,6 +213,7 @@ def get_date_of_birth():
 # Optional field getters
 @app.route('/api/user/income', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_income():
     try:
         user_data = UserDataCollection()
@@ -124,6 +223,7 @@ def get_income():
 
 @app.route('/api/user/zip_code', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_zip_code():
     try:
         user_data = UserDataCollection()
@@ -133,6 +233,7 @@ def get_zip_code():
 
 @app.route('/api/user/credit_score', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_credit_score():
     try:
         user_data = UserDataCollection()
@@ -267,6 +368,7 @@ def set_date_of_birth():
 
 @app.route('/api/user/assets', methods=['GET'])
 @require_auth
+@etag_from_version(_user_doc_version)
 def get_assets():
     try:
         user_data = UserDataCollection()
@@ -358,7 +460,7 @@ def create_link_token():
             return jsonify({'error': 'User not authenticated'}), 401
 
         app.logger.info(f"Creating link token for user: {user_id}")
-        plaid_client = credentials_manager.create_plaid_client()
+        plaid_client = credentials_manager.get_plaid_client()
         
         # Create the Link token request with account filters
         request_data = LinkTokenCreateRequest(
@@ -367,6 +469,9 @@ def create_link_token():
             ),
             client_name="Fynn",
             products=[Products("auth"), Products("transactions"), Products("liabilities"), Products("investments")],
+            transactions=LinkTokenTransactions(
+                days_requested=TRANSACTIONS_SYNC_DAYS_REQUESTED
+            ),
             country_codes=[CountryCode('US')],
             language='en',
             redirect_uri=PLAID_REDIRECT_URI
@@ -415,7 +520,7 @@ def exchange_public_token():
         if not public_token:
             return jsonify({'error': 'Public token is required'}), 400
             
-        plaid_client = credentials_manager.create_plaid_client()
+        plaid_client = credentials_manager.get_plaid_client()
         
         try:
             # Exchange the public token for an access token
@@ -473,13 +578,32 @@ def get_financial_profile():
     Get a comprehensive financial profile for the authenticated user.
     Query Parameters:
         transactions_days (optional): Number of days of transaction history to include (default: 30)
+        fields (optional): Comma-separated sections to return, e.g. "accounts,summary"
+            (default: all); sections that aren't requested aren't fetched from Plaid
+        transactions_limit (optional): Transactions per page (default: all, unpaged)
+        transactions_cursor (optional): transactions_next_cursor from the previous page
     """
     try:
         # Get transactions_days from query parameters, default to 30
         transactions_days = request.args.get('transactions_days', default=30, type=int)
+        fields = request.args.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+        transactions_limit = request.args.get('transactions_limit')
+        if transactions_limit is not None:
+            try:
+                transactions_limit = int(transactions_limit)
+            except ValueError:
+                return jsonify({'error': 'transactions_limit must be an integer'}), 400
+        transactions_cursor = request.args.get('transactions_cursor')
+        validate_financial_profile_request(fields, transactions_limit, transactions_cursor)
         
         # Get the profile using the data service
-        profile = get_user_financial_profile(transactions_days=transactions_days)
+        profile = get_user_financial_profile(
+            transactions_days=transactions_days,
+            fields=fields,
+            transactions_limit=transactions_limit,
+            transactions_cursor=transactions_cursor
+        )
         
         return jsonify(profile)
         
@@ -502,13 +626,25 @@ def stream_gpt_response():
         if not user_id:
             return jsonify({'error': 'User not authenticated'}), 401
 
-        # Retrieve existing messages from session or initialize
-        messages = session.get('messages') or chat_service.initialize_chat(user_id)
+        # Load the conversation from the server-side store; only its ID is in the session
+        conversation_store = get_conversation_store()
+        conversation_id = session.get('conversation_id')
+        messages = conversation_store.load(conversation_id, user_id) if conversation_id else None
+        if messages is None:
+            messages = chat_service.initialize_chat(user_id)
+            conversation_id = conversation_store.create(user_id, messages)
+            session['conversation_id'] = conversation_id
+        history_length = len(messages)
 
         def generate():
             """Generator function to stream responses."""
-            for content in chat_service.get_response_stream(messages, prompt):
-                yield f"data: {content}\n\n"
+            try:
+                for content in chat_service.get_response_stream(messages, prompt):
+                    yield f"data: {content}\n\n"
+            finally:
+                # Persist this turn's prompt and reply as one appended chunk, also when
+                # the client disconnects mid-stream
+                conversation_store.append(conversation_id, user_id, messages[history_length:])
 
         return Response(
             generate(),
@@ -526,4 +662,5 @@ def stream_gpt_response():
         }), 500
 
 if __name__ == '__main__':
+    # Development server only; see gunicorn.conf.py for production
     app.run(host='0.0.0.0', port=5002, debug=True)
@@ -1,9 +1,99 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-from typing import Optional, Union
-from datetime import date
-from flask import session
-from EncryptionKeyStorage.API_key_manager import APIKeyManager
+import os
+from firebase_admin import firestore
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Union
+from datetime import date, datetime, time, timezone
+from flask import session, g, has_app_context
+from StorageBackend.storage_backend import get_storage_backend
+from Caching.ttl_cache import TTLCache
+from Caching.snapshot_cache import SnapshotCache
+
+def _validate_non_negative(label: str):
+    def validate(value):
+        if value < 0:
+            raise ValueError(f"{label} cannot be negative")
+    return validate
+
+def _validate_not_blank(label: str):
+    def validate(value):
+        if not value or not value.strip():
+            raise ValueError(f"{label} cannot be empty")
+    return validate
+
+def _validate_zip_code(zip_code):
+    if not isinstance(zip_code, str) or not zip_code.isdigit() or len(zip_code) != 5:
+        raise ValueError("Invalid ZIP code format")
+
+def _validate_credit_score(credit_score):
+    if not isinstance(credit_score, int) or credit_score < 300 or credit_score > 850:
+        raise ValueError("Invalid credit score. Must be an integer between 300 and 850")
+
+def _validate_email(email):
+    if not email or '@' not in email:
+        raise ValueError("Invalid email format")
+
+def _validate_date_of_birth(dob):
+    if not isinstance(dob, date):
+        raise ValueError("Date of birth must be a date object")
+
+def _to_stored_value(value):
+    """Firestore stores timestamps, not dates, so dates are written as midnight UTC."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, time.min, tzinfo=timezone.utc)
+    return value
+
+def _to_date(value) -> Optional[date]:
+    """Convert a stored date of birth (a timestamp, or a date from older writes) to a date."""
+    if not value:
+        return None
+    return value.date() if isinstance(value, datetime) else value
+
+# gpt_data documents fetched together for chat context
+GPT_DATA_DOCUMENTS = ('goals', 'preferences', 'memories', 'conclusions')
+
+# gpt_data documents that are part of the user's profile
+PROFILE_GPT_DATA_DOCUMENTS = ('goals', 'preferences')
+
+# The memories document holds the most recent memories; once it grows past
+# MEMORY_HEAD_LIMIT, all but the newest MEMORY_HEAD_KEEP are moved into a page
+# document under gpt_data/memories/pages, so appends never rewrite the full history.
+MEMORY_HEAD_LIMIT = 200
+MEMORY_HEAD_KEEP = 100
+
+# Per-user GPTContext cache; writes through this class update or drop the entry,
+# and the TTL bounds staleness from writes made by other processes
+GPT_CONTEXT_CACHE_SIZE = 1024
+GPT_CONTEXT_CACHE_TTL = 300  # seconds
+
+# Set USER_DOC_LISTENERS=1 to keep active users' documents cached through on_snapshot
+# listeners (see SnapshotCache), so reads skip Firestore and see writes from any worker
+USER_DOC_LISTENERS = os.getenv('USER_DOC_LISTENERS', '').lower() in ('1', 'true', 'yes')
+USER_DOC_LISTENER_MAX_WATCHES = int(os.getenv('USER_DOC_LISTENER_MAX_WATCHES', '256'))
+
+@dataclass
+class GPTContext:
+    """The user's gpt_data documents, as used to build chat context."""
+    goals: str = ""
+    preferences: str = ""
+    memories: List[str] = field(default_factory=list)
+    conclusions: str = ""
+
+# Max document references per get_all call in the multi-user reads
+BULK_READ_BATCH_SIZE = 100
+
+# Profile field name -> (gpt_data document or None for the user document, stored key, validator)
+PROFILE_FIELDS = {
+    'first_name': (None, 'firstName', _validate_not_blank("First name")),
+    'last_name': (None, 'lastName', _validate_not_blank("Last name")),
+    'email': (None, 'email', _validate_email),
+    'date_of_birth': (None, 'date_of_birth', _validate_date_of_birth),
+    'income': (None, 'income', _validate_non_negative("Income")),
+    'assets': (None, 'assets', _validate_non_negative("Assets")),
+    'zip_code': (None, 'zipCode', _validate_zip_code),
+    'credit_score': (None, 'creditScore', _validate_credit_score),
+    'goals': ('goals', 'set_goals', _validate_not_blank("Goals")),
+    'preferences': ('preferences', 'preferences', _validate_not_blank("Preferences")),
+}
 
 class UserDataCollection:
     _instance = None
@@ -18,96 +108,232 @@ class UserDataCollection:
         if self._initialized:
             return
             
-        # Initialize Firebase if not already initialized
-        if not firebase_admin._apps:
-            cred = credentials.Certificate(APIKeyManager.get_firebase_path())
-            firebase_admin.initialize_app(cred)
-        
-        self.db = firestore.client()
+        self.db = get_storage_backend().client()
+        self._gpt_context_cache = TTLCache(maxsize=GPT_CONTEXT_CACHE_SIZE, ttl=GPT_CONTEXT_CACHE_TTL)
+        # Goals and preferences alone, for profile reads without a cached chat context
+        self._profile_context_cache = TTLCache(maxsize=GPT_CONTEXT_CACHE_SIZE, ttl=GPT_CONTEXT_CACHE_TTL)
+        self._user_doc_cache = None
+        if USER_DOC_LISTENERS:
+            self.enable_user_doc_listeners()
         self._initialized = True
 
+    def enable_user_doc_listeners(self, max_watches: int = USER_DOC_LISTENER_MAX_WATCHES) -> None:
+        """Serve user documents from snapshot listeners instead of per-request reads.
+        
+        Works with every storage backend, including the in-memory one.
+        """
+        if self._user_doc_cache is not None:
+            self._user_doc_cache.close()
+        self._user_doc_cache = SnapshotCache(max_watches=max_watches)
+
+    def disable_user_doc_listeners(self) -> None:
+        """Stop every user document listener and go back to per-request reads."""
+        if self._user_doc_cache is not None:
+            self._user_doc_cache.close()
+            self._user_doc_cache = None
+
+    @classmethod
+    def for_user(cls, user_id: str) -> 'UserDataCollection':
+        """Get a handle whose methods act on user_id rather than the session's user.
+        
+        The handle shares the client and caches of the singleton, and works outside
+        a request, so background jobs and worker pools can use every getter and setter.
+        """
+        if not user_id:
+            raise ValueError("user_id is required")
+        return _UserScopedDataCollection(cls(), user_id)
+
+    def _request_snapshots(self) -> Dict[str, Any]:
+        """Get the per-request user document snapshots (a throwaway dict outside a request)."""
+        return g.setdefault('user_doc_snapshots', {}) if has_app_context() else {}
+
     def _get_current_user_id(self) -> str:
         """Get the current user's Firebase Auth UID from the session."""
         if 'firebase_user_id' not in session:
             raise ValueError("No authenticated Firebase user found in session")
         return session['firebase_user_id']
 
+    def _get_user_doc(self):
+        """Get the current user's document snapshot, read at most once per request.
+        
+        The snapshot is kept on flask.g, so every getter called while handling a
+        request shares a single Firestore read. Writes drop it (see update_profile).
+        With user document listeners enabled, the snapshot comes from the listener
+        cache instead, and only the first read for a user goes to Firestore.
+        """
+        user_id = self._get_current_user_id()
+        snapshots = self._request_snapshots()
+        doc = snapshots.get(user_id)
+        if doc is None:
+            user_ref = self.db.collection('users').document(user_id)
+            if self._user_doc_cache is not None:
+                doc = self._user_doc_cache.get(user_id)
+                if doc is None:
+                    self._user_doc_cache.watch(user_id, user_ref)
+            if doc is None:
+                doc = user_ref.get()
+            if not doc.exists:
+                raise ValueError(f"User {user_id} not found")
+            snapshots[user_id] = doc
+        return doc
+
+    def get_profile(self) -> Dict[str, Any]:
+        """Get all of the user's profile fields.
+        
+        Reads the user document once per request, plus the goals and preferences
+        documents unless they are cached (see _get_profile_context).
+        """
+        return self._build_profile(self._get_user_doc().to_dict(), self._get_profile_context())
+
+    def _get_profile_context(self) -> GPTContext:
+        """Get a GPTContext with the profile's goals and preferences filled in.
+        
+        Uses the cached chat context when there is one; otherwise reads only the goals
+        and preferences documents (not memories or conclusions) with one batched read.
+        """
+        user_id = self._get_current_user_id()
+        context = self._gpt_context_cache.get(user_id) or self._profile_context_cache.get(user_id)
+        if context is not None:
+            return context
+        
+        gpt_data = self.db.collection('users').document(user_id).collection('gpt_data')
+        refs = [gpt_data.document(name) for name in PROFILE_GPT_DATA_DOCUMENTS]
+        docs = {doc.id: doc.to_dict() or {} for doc in self.db.get_all(refs) if doc.exists}
+        context = GPTContext(
+            goals=docs.get('goals', {}).get('set_goals', ""),
+            preferences=docs.get('preferences', {}).get('preferences', "")
+        )
+        self._profile_context_cache.set(user_id, context)
+        return context
+
+    def get_user_doc_version(self) -> str:
+        """Get a token that changes whenever the user document changes (its update time).
+
+        Reads the same per-request snapshot as the getters, so a version and the
+        values read alongside it always match.
+        """
+        return self._get_user_doc().update_time.isoformat()
+
+    def get_profile_version(self) -> str:
+        """Get a token that changes whenever get_profile's result can change."""
+        context = self._get_profile_context()
+        return f"{self.get_user_doc_version()}|{context.goals}|{context.preferences}"
+
+    def get_profiles(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the profiles of many users, for batch jobs.
+        
+        Reads each user's document and goals and preferences documents with batched
+        get_all calls (BULK_READ_BATCH_SIZE references per call) instead of per-user reads.
+        
+        Args:
+            user_ids: Firebase Auth UIDs of the users
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Profiles keyed by user ID, in the get_profile
+            format; users without a document are left out
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        users = self.db.collection('users')
+        refs = []
+        for user_id in user_ids:
+            user_ref = users.document(user_id)
+            refs.append(user_ref)
+            refs.extend(user_ref.collection('gpt_data').document(name) for name in PROFILE_GPT_DATA_DOCUMENTS)
+        
+        # Snapshot data keyed by (user_id, document id), where user documents use None
+        docs: Dict[tuple, Dict[str, Any]] = {}
+        for start in range(0, len(refs), BULK_READ_BATCH_SIZE):
+            for doc in self.db.get_all(refs[start:start + BULK_READ_BATCH_SIZE]):
+                if not doc.exists:
+                    continue
+                path = doc.reference.path.split('/')
+                if len(path) == 2:
+                    docs[(path[1], None)] = doc.to_dict() or {}
+                else:
+                    docs[(path[1], doc.id)] = doc.to_dict() or {}
+        
+        profiles = {}
+        for user_id in user_ids:
+            if (user_id, None) not in docs:
+                continue
+            gpt_context = GPTContext(
+                goals=docs.get((user_id, 'goals'), {}).get('set_goals', ""),
+                preferences=docs.get((user_id, 'preferences'), {}).get('preferences', "")
+            )
+            profiles[user_id] = self._build_profile(docs[(user_id, None)], gpt_context)
+        return profiles
+
+    @staticmethod
+    def _build_profile(data: Dict[str, Any], gpt_context: GPTContext) -> Dict[str, Any]:
+        """Shape a user document's data and gpt_data context into a profile dict."""
+        def optional(*fields):
+            for field in fields:
+                if data.get(field) is not None:
+                    return data[field]
+            return "Field not present."
+        
+        return {
+            'first_name': data.get('firstName'),
+            'last_name': data.get('lastName'),
+            'email': data.get('email'),
+            'date_of_birth': _to_date(data.get('date_of_birth')),
+            'income': optional('income'),
+            'assets': optional('assets'),
+            'zip_code': optional('zipCode'),
+            'credit_score': optional('creditScore', 'credit_score'),
+            'goals': gpt_context.goals,
+            'preferences': gpt_context.preferences
+        }
+
     # Required field getters
     def get_first_name(self) -> str:
         """Get user's first name."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         return doc.get('firstName')
 
     def get_last_name(self) -> str:
         """Get user's last name."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         return doc.get('lastName')
 
     def get_email(self) -> str:
         """Get user's email."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         return doc.get('email')
 
     def get_password(self) -> str:
         """Get user's hashed password."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         return doc.get('password')
 
     def get_date_of_birth(self) -> date:
         """Get user's date of birth."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         dob = doc.get('date_of_birth')
-        return firestore.SERVER_TIMESTAMP.to_date(dob) if dob else None
+        return _to_date(dob)
 
     # Optional field getters
     def get_income(self) -> Union[float, str]:
         """Get user's income if provided."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         income = doc.get('income')
         return income if income is not None else "Field not present."
 
     def get_assets(self) -> Union[float, str]:
         """Get user's assets if provided."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         assets = doc.get('assets')
         return assets if assets is not None else "Field not present."
 
     def get_zip_code(self) -> Union[str, str]:
         """Get user's zip code if provided."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         zip_code = doc.get('zipCode')
         return zip_code if zip_code is not None else "Field not present."
 
     def get_credit_score(self) -> Union[int, str]:
         """Get user's credit score if provided."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).get()
-        if not doc.exists:
-            raise ValueError(f"User {user_id} not found")
+        doc = self._get_user_doc()
         credit_score = doc.get('creditScore')
         if credit_score is None:
             credit_score = doc.get('credit_score')
@@ -116,127 +342,156 @@ class UserDataCollection:
     # Optional field setters
     def set_income(self, income: float) -> None:
         """Set user's income."""
-        if income < 0:
-            raise ValueError("Income cannot be negative")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'income': income
-        }, merge=True)
+        self.update_profile({'income': income})
 
     def set_assets(self, assets: float) -> None:
         """Set user's assets."""
-        if assets < 0:
-            raise ValueError("Assets cannot be negative")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'assets': assets
-        }, merge=True)
+        self.update_profile({'assets': assets})
 
     def set_zip_code(self, zip_code: str) -> None:
         """Set user's zip code."""
-        if not zip_code.isdigit() or len(zip_code) != 5:
-            raise ValueError("Invalid ZIP code format")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'zipCode': zip_code
-        }, merge=True)
+        self.update_profile({'zip_code': zip_code})
 
     def set_credit_score(self, credit_score: int) -> None:
         """Set user's credit score."""
-        if not isinstance(credit_score, int) or credit_score < 300 or credit_score > 850:
-            raise ValueError("Invalid credit score. Must be an integer between 300 and 850")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'creditScore': credit_score
-        }, merge=True)
+        self.update_profile({'credit_score': credit_score})
 
     def set_first_name(self, first_name: str) -> None:
         """Set user's first name."""
-        if not first_name or not first_name.strip():
-            raise ValueError("First name cannot be empty")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'firstName': first_name
-        }, merge=True)
+        self.update_profile({'first_name': first_name})
 
     def set_last_name(self, last_name: str) -> None:
         """Set user's last name."""
-        if not last_name or not last_name.strip():
-            raise ValueError("Last name cannot be empty")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'lastName': last_name
-        }, merge=True)
+        self.update_profile({'last_name': last_name})
 
     def set_email(self, email: str) -> None:
         """Set user's email."""
-        if not email or '@' not in email:
-            raise ValueError("Invalid email format")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'email': email
-        }, merge=True)
+        self.update_profile({'email': email})
 
     def set_date_of_birth(self, dob: date) -> None:
         """Set user's date of birth."""
-        if not isinstance(dob, date):
-            raise ValueError("Date of birth must be a date object")
+        self.update_profile({'date_of_birth': dob})
+
+    def update_profile(self, fields: Dict[str, Any]) -> None:
+        """Validate and write several profile fields in one batched write.
+        
+        Every field is validated before anything is written, so an invalid value
+        leaves the whole profile unchanged.
+        
+        Args:
+            fields: Values keyed by profile field name (first_name, last_name, email,
+                date_of_birth, income, assets, zip_code, credit_score, goals, preferences)
+        
+        Raises:
+            ValueError: If a field name is unknown or any value is invalid
+        """
+        if not fields:
+            raise ValueError("No profile fields provided")
+        unknown = [name for name in fields if name not in PROFILE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown profile fields: {', '.join(sorted(unknown))}")
+        
+        # Group validated values by the document they live in
+        writes: Dict[Optional[str], Dict[str, Any]] = {}
+        for name, value in fields.items():
+            gpt_doc, key, validate = PROFILE_FIELDS[name]
+            validate(value)
+            writes.setdefault(gpt_doc, {})[key] = _to_stored_value(value)
+        
         user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).set({
-            'date_of_birth': dob
-        }, merge=True)
+        user_ref = self.db.collection('users').document(user_id)
+        batch = self.db.batch()
+        for gpt_doc, values in writes.items():
+            doc_ref = user_ref if gpt_doc is None else user_ref.collection('gpt_data').document(gpt_doc)
+            batch.set(doc_ref, values, merge=True)
+        results = batch.commit()
+        self._request_snapshots().pop(user_id, None)
+        if self._user_doc_cache is not None and None in writes:
+            self._user_doc_cache.expect_write(user_id, max(result.update_time for result in results))
+        
+        gpt_fields = {name: fields[name] for name in ('goals', 'preferences') if name in fields}
+        if gpt_fields:
+            self._update_cached_context(user_id, **gpt_fields)
+
+    def _update_cached_context(self, user_id: str, **changes) -> None:
+        """Write changes through to the user's cached GPTContexts, if any are cached."""
+        for cache in (self._gpt_context_cache, self._profile_context_cache):
+            context = cache.get(user_id)
+            if context is not None:
+                cache.set(user_id, replace(context, **changes))
+
+    def get_gpt_context_cache_stats(self) -> dict:
+        """Get hit/miss statistics for the chat context cache."""
+        return self._gpt_context_cache.stats()
+
+    def get_user_doc_cache_stats(self) -> Optional[dict]:
+        """Get hit/miss statistics for the user document listeners, if enabled."""
+        return self._user_doc_cache.stats() if self._user_doc_cache is not None else None
 
     # GPT Data getters
+    def get_gpt_context(self) -> GPTContext:
+        """Get goals, preferences, memories and conclusions with one batched read.
+        
+        The result is cached per user, so re-opening a chat is served from memory.
+        """
+        user_id = self._get_current_user_id()
+        context = self._gpt_context_cache.get(user_id)
+        if context is not None:
+            return context
+        
+        gpt_data = self.db.collection('users').document(user_id).collection('gpt_data')
+        refs = [gpt_data.document(name) for name in GPT_DATA_DOCUMENTS]
+        docs = {doc.id: doc.to_dict() or {} for doc in self.db.get_all(refs) if doc.exists}
+        
+        memories = docs.get('memories', {}).get('memories', [])
+        if not isinstance(memories, list):
+            memories = []
+        elif len(memories) > MEMORY_HEAD_LIMIT:
+            # A spill is pending (add_to_memories retries it); reads never write
+            memories = memories[-MEMORY_HEAD_KEEP:]
+        context = GPTContext(
+            goals=docs.get('goals', {}).get('set_goals', ""),
+            preferences=docs.get('preferences', {}).get('preferences', ""),
+            memories=memories,
+            conclusions=docs.get('conclusions', {}).get('conclusions', "")
+        )
+        self._gpt_context_cache.set(user_id, context)
+        return context
+
     def get_goals(self) -> str:
         """Get user's goals."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).collection('gpt_data').document('goals').get()
-        if not doc.exists:
-            return ""
-        return doc.get('set_goals', "")
+        return self.get_gpt_context().goals
 
     def get_preferences(self) -> str:
         """Get user's preferences."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).collection('gpt_data').document('preferences').get()
-        if not doc.exists:
-            return ""
-        return doc.get('preferences', "")
+        return self.get_gpt_context().preferences
 
     def get_memories(self) -> list[str]:
-        """Get user's memories as a list. Internal use only."""
+        """Get user's most recent memories as a list (see get_all_memories). Internal use only."""
+        return list(self.get_gpt_context().memories)
+
+    def get_all_memories(self) -> list[str]:
+        """Get every memory the user has, oldest first, including spilled pages. Internal use only."""
         user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).collection('gpt_data').document('memories').get()
-        if not doc.exists:
-            return []
-        return doc.get('memories', [])
+        memories_ref = self.db.collection('users').document(user_id).collection('gpt_data').document('memories')
+        memories = []
+        for page in memories_ref.collection('pages').order_by('page').stream():
+            memories.extend(page.get('memories'))
+        memories.extend(self.get_memories())
+        return memories
 
     def get_conclusions(self) -> str:
         """Get user's conclusions. Internal use only."""
-        user_id = self._get_current_user_id()
-        doc = self.db.collection('users').document(user_id).collection('gpt_data').document('conclusions').get()
-        if not doc.exists:
-            return ""
-        return doc.get('conclusions', "")
+        return self.get_gpt_context().conclusions
 
     # GPT Data setters
     def set_goals(self, goals: str) -> None:
         """Set user's goals."""
-        if not goals or not goals.strip():
-            raise ValueError("Goals cannot be empty")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).collection('gpt_data').document('goals').set({
-            'set_goals': goals
-        }, merge=True)
+        self.update_profile({'goals': goals})
 
     def set_preferences(self, preferences: str) -> None:
         """Set user's preferences."""
-        if not preferences or not preferences.strip():
-            raise ValueError("Preferences cannot be empty")
-        user_id = self._get_current_user_id()
-        self.db.collection('users').document(user_id).collection('gpt_data').document('preferences').set({
-            'preferences': preferences
-        }, merge=True)
+        self.update_profile({'preferences': preferences})
 
     def set_memories(self, memories: list[str]) -> None:
         """Set user's memories list. Internal use only."""
@@ -249,10 +504,14 @@ class UserDataCollection:
         self.db.collection('users').document(user_id).collection('gpt_data').document('memories').set({
             'memories': memories
         }, merge=True)
+        self._gpt_context_cache.invalidate(user_id)
 
     def add_to_memories(self, memories: Union[str, list[str]]) -> None:
         """Append one or more memories to the user's memories list. Internal use only.
         
+        Memories already in the list of recent memories are not added again. Memories
+        that have been spilled into pages are not checked.
+        
         Args:
             memories: Either a single memory string or a list of memory strings to add
         
@@ -269,28 +528,62 @@ class UserDataCollection:
         if not all(isinstance(m, str) and m.strip() for m in memories):
             raise ValueError("All memories must be non-empty strings")
         
-        # Clean the memories (strip whitespace)
-        memories = [m.strip() for m in memories]
+        # Clean the memories (strip whitespace), dropping repeats within this call
+        memories = list(dict.fromkeys(m.strip() for m in memories))
         
+        # ArrayUnion appends atomically and skips memories already in the document,
+        # so concurrent chat sessions can't drop each other's memories.
         user_id = self._get_current_user_id()
         doc_ref = self.db.collection('users').document(user_id).collection('gpt_data').document('memories')
-        doc = doc_ref.get()
-        
-        current_memories = []
-        if doc.exists:
-            current_memories = doc.get('memories', [])
+        doc_ref.set({
+            'memories': firestore.ArrayUnion(memories)
+        }, merge=True)
         
-        # Ensure we're working with a list
-        if not isinstance(current_memories, list):
-            current_memories = []
+        # Mirror ArrayUnion on the cached context. The head's size is only known
+        # without a read when the context is cached; otherwise _spill_memories reads
+        # the head to check it.
+        context = self._gpt_context_cache.get(user_id)
+        if context is not None:
+            existing = set(context.memories)
+            updated = context.memories + [m for m in memories if m not in existing]
+            if len(updated) <= MEMORY_HEAD_LIMIT:
+                self._update_cached_context(user_id, memories=updated)
+                return
+        self._spill_memories()
+
+    def _spill_memories(self) -> None:
+        """Move all but the newest MEMORY_HEAD_KEEP memories into a new page document.
         
-        # Add all new memories
-        current_memories.extend(memories)
+        Called by add_to_memories after its write. The page write and the head trim
+        commit in one batch, conditional on the head being unchanged since it was read.
+        If memories were appended in between, the batch fails and nothing is lost; the
+        next append retries the spill.
+        """
+        user_id = self._get_current_user_id()
+        head_ref = self.db.collection('users').document(user_id).collection('gpt_data').document('memories')
+        snapshot = head_ref.get()
+        if not snapshot.exists:
+            return
+        data = snapshot.to_dict()
+        memories = data.get('memories', [])
+        if len(memories) <= MEMORY_HEAD_LIMIT:
+            return
         
-        # Update the document
-        doc_ref.set({
-            'memories': current_memories
-        }, merge=True)
+        page = data.get('pages', 0)
+        batch = self.db.batch()
+        batch.set(head_ref.collection('pages').document(f'{page:06d}'), {
+            'page': page,
+            'memories': memories[:-MEMORY_HEAD_KEEP]
+        })
+        batch.update(head_ref, {
+            'memories': memories[-MEMORY_HEAD_KEEP:],
+            'pages': page + 1
+        }, option=self.db.write_option(last_update_time=snapshot.update_time))
+        try:
+            batch.commit()
+        except Exception as e:
+            print(f"Skipped memory spill for user {user_id}, will retry on a later append: {str(e)}")
+        self._gpt_context_cache.invalidate(user_id)
 
     def set_conclusions(self, conclusions: str) -> None:
         """Set user's conclusions. Internal use only."""
@@ -300,3 +593,21 @@ class UserDataCollection:
         self.db.collection('users').document(user_id).collection('gpt_data').document('conclusions').set({
             'conclusions': conclusions
         }, merge=True)
+        self._update_cached_context(user_id, conclusions=conclusions)
+
+class _UserScopedDataCollection(UserDataCollection):
+    """UserDataCollection bound to one user ID (see UserDataCollection.for_user)."""
+
+    def __new__(cls, base: UserDataCollection, user_id: str):
+        return object.__new__(cls)
+
+    def __init__(self, base: UserDataCollection, user_id: str):
+        self._base = base
+        self._user_id = user_id
+
+    def __getattr__(self, name: str):
+        # Client, caches and listener settings always come from the shared instance
+        return getattr(self._base, name)
+
+    def _get_current_user_id(self) -> str:
+        return self._user_id
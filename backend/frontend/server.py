@@ -6,9 +6,9 @@ import signal
 import threading
 from werkzeug.serving import make_server
 
-# Add the root directory to Python path to import APIKeyManager
+# Add the root directory to Python path to import PlaidCredentialsManager
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from EncryptionKeyStorage.API_key_manager import APIKeyManager
+from PlaidConnection.plaid_credentials_manager import PlaidCredentialsManager
 
 class ServerThread(threading.Thread):
     def __init__(self, app):
@@ -32,24 +32,9 @@ def create_app():
     # Configure CORS properly
     app.config['CORS_HEADERS'] = 'Content-Type'
     
-    # Initialize API Key Manager
-    key_manager = APIKeyManager()
-
     try:
-        # Configure Plaid client
-        from plaid.api.plaid_api import PlaidApi
-        from plaid.api_client import ApiClient
-        from plaid.configuration import Configuration
-
-        configuration = Configuration(
-            host='https://sandbox.plaid.com',
-            api_key={
-                'clientId': key_manager.get_api_key('p_clientid'),
-                'secret': key_manager.get_api_key('p_secret')
-            }
-        )
-        api_client = ApiClient(configuration)
-        plaid_client = PlaidApi(api_client)
+        # Use the shared, pooled Plaid client
+        plaid_client = PlaidCredentialsManager().get_plaid_client()
         print("Plaid client initialized successfully")
     except Exception as e:
         print(f"Error initializing Plaid client: {str(e)}")
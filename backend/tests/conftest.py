@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run against the in-memory storage backend; nothing here needs Firebase
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
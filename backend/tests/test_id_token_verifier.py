@@ -0,0 +1,106 @@
+import datetime
+import hashlib
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+import UserDataCollection.id_token_verifier as id_token_verifier
+from UserDataCollection.id_token_verifier import IdTokenVerifier
+
+PROJECT_ID = 'test-project'
+
+def _key_and_cert():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'test')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return key_pem.decode(), cert.public_bytes(serialization.Encoding.PEM).decode()
+
+SIGNING_KEY, SIGNING_CERT = _key_and_cert()
+OTHER_KEY, _ = _key_and_cert()
+
+class _CertsResponse:
+    headers = {'Cache-Control': 'public, max-age=3600'}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'key-1': SIGNING_CERT}
+
+@pytest.fixture
+def verifier(monkeypatch):
+    fetches = []
+    monkeypatch.setattr(id_token_verifier.requests, 'get', lambda url, timeout: fetches.append(url) or _CertsResponse())
+    verifier = IdTokenVerifier(PROJECT_ID)
+    verifier.fetches = fetches
+    return verifier
+
+def _token(key=SIGNING_KEY, kid='key-1', **overrides):
+    now = int(time.time())
+    claims = {
+        'iss': f'https://securetoken.google.com/{PROJECT_ID}',
+        'aud': PROJECT_ID,
+        'sub': 'user-1',
+        'iat': now - 10,
+        'exp': now + 3600,
+        'auth_time': now - 10,
+    }
+    claims.update(overrides)
+    signer = crypt.RSASigner.from_string(key, key_id=kid)
+    return jwt.encode(signer, claims).decode()
+
+def test_valid_token(verifier):
+    assert verifier.verify(_token())['uid'] == 'user-1'
+
+@pytest.mark.parametrize('overrides', [
+    {'aud': 'other-project'},
+    {'iss': 'https://securetoken.google.com/other-project'},
+    {'exp': int(time.time()) - 100, 'iat': int(time.time()) - 200},
+    {'sub': ''},
+    {'auth_time': int(time.time()) + 100},
+])
+def test_rejected_claims(verifier, overrides):
+    with pytest.raises(ValueError):
+        verifier.verify(_token(**overrides))
+
+def test_wrong_signing_key(verifier):
+    with pytest.raises(ValueError):
+        verifier.verify(_token(key=OTHER_KEY))
+
+def test_cached_entry_does_not_outlive_exp(verifier):
+    token = _token(exp=int(time.time()) + 1)
+    verifier.verify(token)
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    assert verifier._verified.get(token_hash) is not None
+
+    time.sleep(1.1)
+    assert verifier._verified.get(token_hash) is None
+
+def test_unknown_key_refetches_at_most_once_per_interval(verifier):
+    verifier.verify(_token())
+    assert len(verifier.fetches) == 1
+
+    # Certificates were just fetched, so an unknown key doesn't refetch yet
+    with pytest.raises(ValueError):
+        verifier.verify(_token(kid='key-2'))
+    assert len(verifier.fetches) == 1
+
+    verifier._certs_fetched_at -= id_token_verifier.UNKNOWN_KEY_REFRESH_INTERVAL
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            verifier.verify(_token(kid='key-2'))
+    assert len(verifier.fetches) == 2
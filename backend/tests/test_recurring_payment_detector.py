@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from PlaidConnection.plaid_data_service import RecurringPaymentDetector
+
+def _transaction(days_ago: int, amount: float = 15.99, name: str = 'Netflix'):
+    return {
+        'date': (date.today() - timedelta(days=days_ago)).isoformat(),
+        'name': name,
+        'merchant_name': name,
+        'amount': amount,
+        'category': ['Subscription'],
+    }
+
+def _detector_with_evicted_payment():
+    detector = RecurringPaymentDetector(lookback_days=180)
+    detector.update(added=[('old', _transaction(100)), ('recent', _transaction(5, name='Spotify'))], modified=[], removed=[])
+    # Shrink the window so the next analysis evicts 'old' and empties its merchant
+    detector.lookback_days = 30
+    detector.analyze()
+    assert 'old' not in detector._index
+    assert 'Netflix' not in detector._merchants
+    return detector
+
+def test_modify_after_eviction():
+    detector = _detector_with_evicted_payment()
+    detector.update(added=[], modified=[('old', _transaction(100, amount=16.99))], removed=[])
+    detector.analyze()
+
+def test_remove_after_eviction():
+    detector = _detector_with_evicted_payment()
+    detector.update(added=[], modified=[], removed=['old'])
+    assert detector.analyze()
+
+def test_modified_payment_moves_back_into_window():
+    detector = _detector_with_evicted_payment()
+    detector.update(added=[], modified=[('old', _transaction(10))], removed=[])
+    assert detector._index['old'] == 'Netflix'
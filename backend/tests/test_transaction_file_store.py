@@ -0,0 +1,37 @@
+import os
+
+from cryptography.fernet import Fernet
+
+from PlaidConnection.transaction_file_store import TransactionFileStore
+
+def _transaction(amount: float, name: str = 'Coffee Shop'):
+    return {'date': '2024-03-01', 'name': name, 'merchant_name': name, 'amount': amount, 'category': ['Food']}
+
+def test_same_id_added_and_modified_in_one_batch(tmp_path):
+    store = TransactionFileStore(str(tmp_path), Fernet(Fernet.generate_key()))
+    store.append('item', [('t1', _transaction(4.5))], [('t1', _transaction(5.0))], [], 'cursor-1')
+
+    transactions, cursor = store.read_sync_state('item')
+    assert cursor == 'cursor-1'
+    assert list(transactions) == ['t1']
+    assert transactions['t1']['amount'] == 5.0
+    assert len(store.read_table('item')) == 1
+
+def test_removed_in_same_batch_wins(tmp_path):
+    store = TransactionFileStore(str(tmp_path), Fernet(Fernet.generate_key()))
+    store.append('item', [('t1', _transaction(4.5)), ('t2', _transaction(9.0))], [], ['t1'], 'cursor-1')
+
+    transactions, _ = store.read_sync_state('item')
+    assert list(transactions) == ['t2']
+
+def test_names_and_ids_are_encrypted_on_disk(tmp_path):
+    key = Fernet.generate_key()
+    store = TransactionFileStore(str(tmp_path), Fernet(key))
+    store.append('item', [('txn-secret-id', _transaction(4.5, name='Secret Clinic'))], [], [], 'cursor-1')
+
+    for file_name in os.listdir(tmp_path / 'item'):
+        data = (tmp_path / 'item' / file_name).read_bytes()
+        assert b'Secret Clinic' not in data and b'txn-secret-id' not in data
+    # Readable again with the same key
+    transactions, _ = TransactionFileStore(str(tmp_path), Fernet(key)).read_sync_state('item')
+    assert transactions['txn-secret-id']['name'] == 'Secret Clinic'
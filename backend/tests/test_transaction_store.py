@@ -0,0 +1,33 @@
+from cryptography.fernet import Fernet
+
+import PlaidConnection.plaid_data_service as plaid_data_service
+from PlaidConnection.plaid_data_service import _get_store_entry, _transaction_store, credentials_manager
+from PlaidConnection.transaction_file_store import TransactionFileStore, item_key
+
+def _linked_user(user_id: str, access_token: str):
+    credentials_manager.db.collection('users').document(user_id).set({'firstName': 'Ada'})
+    credentials_manager.store_user_access_token(user_id, access_token, 'item-1')
+
+def test_removed_token_drops_its_item(tmp_path, monkeypatch):
+    file_store = TransactionFileStore(str(tmp_path), Fernet(Fernet.generate_key()))
+    monkeypatch.setattr(plaid_data_service, '_file_store', file_store)
+    _linked_user('store-user', 'access-old')
+    _get_store_entry('access-old')
+    file_store.append(item_key('access-old'), [], [], [], 'cursor-1')
+
+    credentials_manager.remove_user_access_token('store-user')
+
+    assert _transaction_store.get('access-old') is None
+    assert not (tmp_path / item_key('access-old')).exists()
+
+def test_replaced_token_drops_the_old_item():
+    _linked_user('relink-user', 'access-first')
+    entry = _get_store_entry('access-first')
+
+    credentials_manager.store_user_access_token('relink-user', 'access-second', 'item-2')
+
+    assert _transaction_store.get('access-first') is None
+    assert _get_store_entry('access-first') is not entry
+
+def test_store_entry_is_reused_while_cached():
+    assert _get_store_entry('access-reused') is _get_store_entry('access-reused')
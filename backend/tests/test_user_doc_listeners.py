@@ -0,0 +1,28 @@
+import pytest
+
+from UserDataCollection.user_data_collection import UserDataCollection
+
+@pytest.fixture
+def user_data():
+    base = UserDataCollection()
+    base.enable_user_doc_listeners()
+    base.db.collection('users').document('listener-user').set({'firstName': 'Ada', 'email': 'ada@example.com'})
+    yield UserDataCollection.for_user('listener-user')
+    base.disable_user_doc_listeners()
+
+def test_listener_update_reaches_user_doc(user_data):
+    assert user_data.get_first_name() == 'Ada'
+
+    # A write from elsewhere (e.g. another worker) arrives through the listener
+    user_data.db.collection('users').document('listener-user').set({'firstName': 'Grace'}, merge=True)
+
+    hits = user_data.get_user_doc_cache_stats()['hits']
+    assert user_data._get_user_doc().to_dict()['firstName'] == 'Grace'
+    assert user_data.get_user_doc_cache_stats()['hits'] == hits + 1
+
+def test_local_write_is_visible_on_next_read(user_data):
+    user_data.get_first_name()
+    user_data.update_profile({'first_name': 'Grace', 'income': 1000})
+
+    assert user_data.get_first_name() == 'Grace'
+    assert user_data.get_income() == 1000
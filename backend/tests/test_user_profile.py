@@ -0,0 +1,28 @@
+from datetime import date, datetime
+
+from UserDataCollection.user_data_collection import UserDataCollection
+
+def _user(user_id: str):
+    UserDataCollection().db.collection('users').document(user_id).set({'firstName': 'Ada', 'email': 'ada@example.com'})
+    return UserDataCollection.for_user(user_id)
+
+def test_profile_with_date_of_birth():
+    user_data = _user('dob-user')
+    user_data.update_profile({'date_of_birth': date(1990, 1, 2)})
+
+    # Stored as a timestamp, which is what Firestore accepts
+    stored = user_data.db.collection('users').document('dob-user').get().get('date_of_birth')
+    assert isinstance(stored, datetime)
+
+    profile = user_data.get_profile()
+    assert profile['date_of_birth'] == date(1990, 1, 2)
+    assert profile['first_name'] == 'Ada'
+    assert user_data.get_date_of_birth() == date(1990, 1, 2)
+
+def test_bulk_profiles_with_and_without_date_of_birth():
+    _user('bulk-with-dob').update_profile({'date_of_birth': date(1985, 6, 30)})
+    _user('bulk-without-dob')
+
+    profiles = UserDataCollection().get_profiles(['bulk-with-dob', 'bulk-without-dob'])
+    assert profiles['bulk-with-dob']['date_of_birth'] == date(1985, 6, 30)
+    assert profiles['bulk-without-dob']['date_of_birth'] is None
@@ -67,8 +67,8 @@ function App() {
         'Content-Type': 'application/json'
       };
 
-      // Define the endpoints to fetch
-      const endpoints = [
+      // Fetch every profile field in a single request
+      const profileFields = [
         'first_name',
         'last_name',
         'email',
@@ -77,27 +77,17 @@ function App() {
       ];
 
       try {
-        // Fetch all data in parallel
-        const responses = await Promise.all(
-          endpoints.map(endpoint =>
-            fetch(`${backendApiPreface}/api/user/${endpoint}`, {
-              method: 'GET',
-              headers,
-              credentials: 'include'
-            })
-          )
-        );
-
-        // Process all responses
-        const results = await Promise.all(
-          responses.map(async (response, index) => {
-            if (!response.ok) {
-              throw new Error(`Failed to fetch ${endpoints[index]}`);
-            }
-            const data = await response.json();
-            return [endpoints[index], data[endpoints[index]]];
-          })
-        );
+        const response = await fetch(`${backendApiPreface}/api/user/profile`, {
+          method: 'GET',
+          headers,
+          credentials: 'include'
+        });
+
+        if (!response.ok) {
+          throw new Error('Failed to fetch profile');
+        }
+        const data = await response.json();
+        const results = profileFields.map(field => [field, data[field]]);
 
         // Combine all results into a single object
         const profileData = Object.fromEntries(results) as ProfileData;